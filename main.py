@@ -84,8 +84,25 @@ class ConnectionMonitor:
         }
 
 class TemperatureMonitorApp:
+    # Seconds to wait for further changes before writing the config to disk
+    CONFIG_SAVE_DELAY = 0.5
+    # Requests the web server handles at once - one process, since the web app shares this object
+    WEB_SERVER_THREADS = 16
+    # Milliseconds a status refresh waits so requests arriving together share one redraw
+    STATUS_REFRESH_DELAY_MS = 50
+    
     def __init__(self):
         self.monitoring_active = False
+        # Pending debounced config write and the JSON last written to disk
+        self._config_save_timer = None
+        self._config_save_lock = threading.Lock()
+        self._config_write_lock = threading.Lock()
+        self._saved_config_content = None
+        # Bumped on every save so readers can tell when cached views of the config are stale
+        self.config_version = 0
+        # Set while a status display refresh is queued on the Tk event loop
+        self._status_refresh_pending = False
+        self._status_refresh_lock = threading.Lock()
         self.setup_paths()
         self.load_config()
         self.setup_tts()
@@ -189,14 +206,38 @@ class TemperatureMonitorApp:
             self.config = self.default_config.copy()
     
     def save_config(self):
-        """Save configuration to JSON file"""
+        """Save configuration to JSON file - saves made in quick succession are written once"""
+        self.config_version += 1
+        with self._config_save_lock:
+            if self._config_save_timer is None:
+                self._config_save_timer = threading.Timer(self.CONFIG_SAVE_DELAY, self.flush_config)
+                self._config_save_timer.daemon = True
+                self._config_save_timer.start()
+    
+    def flush_config(self):
+        """Write any pending configuration changes to disk now"""
+        with self._config_save_lock:
+            if self._config_save_timer is not None:
+                self._config_save_timer.cancel()
+                self._config_save_timer = None
+        
         config_file = self.config_path / "settings.json"
-        try:
-            with open(config_file, 'w') as f:
-                json.dump(self.config, f, indent=4)
-            logger.info("Configuration saved")
-        except Exception as e:
-            logger.error(f"Error saving config: {e}")
+        with self._config_write_lock:
+            try:
+                content = json.dumps(self.config, indent=4)
+                # Nothing changed since the last write
+                if content == self._saved_config_content:
+                    return
+                
+                # Write to a temporary file first so a crash never leaves a half-written config
+                temp_file = config_file.with_suffix('.json.tmp')
+                with open(temp_file, 'w') as f:
+                    f.write(content)
+                os.replace(temp_file, config_file)
+                self._saved_config_content = content
+                logger.info("Configuration saved")
+            except Exception as e:
+                logger.error(f"Error saving config: {e}")
     
     def setup_tts(self):
         """Initialize TTS engine"""
@@ -426,7 +467,7 @@ class TemperatureMonitorApp:
                 self.add_log_message(f"✅ Gmail auto-connected: {message}")
                 
                 # Update GUI status on main thread
-                self.root.after(0, self.update_status_display)
+                self.request_status_refresh()
                 
                 # Test email search to verify everything works
                 try:
@@ -695,8 +736,20 @@ class TemperatureMonitorApp:
             host = self.config["web_server"]["host"]
             port = self.config["web_server"]["port"]
             
-            logger.info(f"Starting web server on {host}:{port}")
-            app.run(host=host, port=port, debug=False, use_reloader=False)
+            # Serve with waitress when installed - a production WSGI server that works on Windows
+            try:
+                from waitress import serve
+            except ImportError:
+                serve = None
+            
+            if serve:
+                logger.info(f"Starting web server on {host}:{port} (waitress, {self.WEB_SERVER_THREADS} threads)")
+                serve(app, host=host, port=port, threads=self.WEB_SERVER_THREADS)
+            else:
+                logger.info(f"Starting web server on {host}:{port}")
+                # Each request gets its own thread, so a slow Gmail/Sheets call
+                # doesn't hold up the other routes
+                app.run(host=host, port=port, debug=False, use_reloader=False, threaded=True)
             
         except ImportError:
             logger.error("Web interface not found. Creating basic Flask app.")
@@ -806,9 +859,9 @@ class TemperatureMonitorApp:
             else:
                 logger.warning("Voice alerts only supported on Windows")
                 
-    except Exception as e:
-        logger.error(f"Error with TTS: {e}")
-        self.add_log_message(f"Voice alert failed: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error with TTS: {e}")
+            self.add_log_message(f"Voice alert failed: {str(e)}")
             
     def test_voice_alert(self):
         """Test voice alert functionality"""
@@ -843,6 +896,20 @@ class TemperatureMonitorApp:
             logger.error(f"Error opening web interface: {e}")
             messagebox.showerror("Error", f"Could not open web interface: {e}")
     
+    def request_status_refresh(self):
+        """Refresh the status display on the Tk thread - requests made while one is queued share it"""
+        with self._status_refresh_lock:
+            if self._status_refresh_pending:
+                return
+            self._status_refresh_pending = True
+        self.root.after(self.STATUS_REFRESH_DELAY_MS, self._run_status_refresh)
+    
+    def _run_status_refresh(self):
+        """Run a queued status refresh"""
+        with self._status_refresh_lock:
+            self._status_refresh_pending = False
+        self.update_status_display()
+    
     def update_status_display(self):
         """Update the status display in GUI with detailed error information"""
         # Gmail status - check both config and real authentication
@@ -1020,6 +1087,7 @@ class TemperatureMonitorApp:
     def quit_application(self, icon=None, item=None):
         """Quit the application"""
         self.running = False
+        self.flush_config()
         
         if self.tray_icon:
             self.tray_icon.stop()
@@ -1107,7 +1175,7 @@ class TemperatureMonitorApp:
             logger.info("Full connectivity recovered")
             
             # Update status display
-            self.root.after(0, self.update_status_display)
+            self.request_status_refresh()
             
             # Restart scheduler if it's not running but should be
             scheduler_enabled = self.config.get('scheduler', {}).get('enabled', False)
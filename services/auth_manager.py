@@ -6,15 +6,47 @@ Handles OAuth 2.0 flow, token storage, and re-authentication for Gmail API acces
 import os
 import json
 import logging
+import time
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+import httplib2
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.model import JsonModel
+
+# orjson is optional - it encodes large Sheets request bodies much faster than json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+class OrjsonModel(JsonModel):
+    """JsonModel that serializes request bodies and parses responses with orjson"""
+    
+    def serialize(self, body_value):
+        if isinstance(body_value, dict) and 'data' not in body_value and self._data_wrapper:
+            body_value = {'data': body_value}
+        return orjson.dumps(body_value).decode('utf-8')
+    
+    def deserialize(self, content):
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # Not JSON - let JsonModel handle it the usual way
+            return super().deserialize(content)
+        if self._data_wrapper and isinstance(body, dict) and 'data' in body:
+            body = body['data']
+        return body
+
 class GmailAuthManager:
     """Handles Gmail OAuth authentication and API service creation"""
     
@@ -25,6 +57,14 @@ class GmailAuthManager:
         'https://www.googleapis.com/auth/drive.file'
     ]
     
+    # Socket timeout for Sheets requests - httplib2 waits forever by default
+    SHEETS_HTTP_TIMEOUT = 30
+    # Most idle worker Sheets clients kept open for reuse
+    SHEETS_POOL_SIZE = 8
+    # Seconds the account email is trusted before asking Gmail again - it cannot
+    # change without re-authenticating, which resets it anyway
+    USER_EMAIL_TTL = 3300
+    
     def __init__(self, app_path):
         """Initialize auth manager with application path"""
         self.app_path = Path(app_path)
@@ -35,6 +75,13 @@ class GmailAuthManager:
         self.gmail_service = None
         self.sheets_service = None
         
+        # (fetched_at, email) from the last getProfile call
+        self._user_email_cache = None
+        
+        # Idle Sheets clients for worker threads, each keeping its connection open between uses
+        self._idle_sheets_services = []
+        self._sheets_pool_lock = threading.Lock()
+        
         # Ensure config directory exists
         self.config_path.mkdir(exist_ok=True)
     
@@ -88,13 +135,15 @@ class GmailAuthManager:
                     token.write(self.creds.to_json())
                 logger.info("Credentials saved to token file")
             
-            # Test the connection by building Gmail service
-            self.gmail_service = build('gmail', 'v1', credentials=self.creds)
-            self.sheets_service = build('sheets', 'v4', credentials=self.creds)
+            # Build the API clients once - they are reused for the lifetime of the app
+            self.gmail_service = build('gmail', 'v1', credentials=self.creds, cache_discovery=False)
+            self.sheets_service = self._build_sheets_service()
+            self._clear_sheets_pool()
             
             # Test with a simple API call
             profile = self.gmail_service.users().getProfile(userId='me').execute()
             email_address = profile.get('emailAddress', 'Unknown')
+            self._user_email_cache = (time.monotonic(), profile.get('emailAddress'))
             
             logger.info(f"Successfully authenticated Gmail for: {email_address}")
             return True, f"Gmail connected successfully: {email_address}"
@@ -109,13 +158,19 @@ class GmailAuthManager:
             return False, error_msg
     
     def get_user_email(self):
-        """Get the authenticated user's email address"""
+        """Get the authenticated user's email address (cached for USER_EMAIL_TTL seconds)"""
         try:
             if not self.gmail_service:
                 return None
             
+            cached = self._user_email_cache
+            if cached and time.monotonic() - cached[0] < self.USER_EMAIL_TTL:
+                return cached[1]
+            
             profile = self.gmail_service.users().getProfile(userId='me').execute()
-            return profile.get('emailAddress')
+            email_address = profile.get('emailAddress')
+            self._user_email_cache = (time.monotonic(), email_address)
+            return email_address
         except Exception as e:
             logger.error(f"Error getting user email: {e}")
             return None
@@ -143,6 +198,8 @@ class GmailAuthManager:
             self.creds = None
             self.gmail_service = None
             self.sheets_service = None
+            self._user_email_cache = None
+            self._clear_sheets_pool()
             
             return True, "Authentication revoked successfully"
             
@@ -161,4 +218,40 @@ class GmailAuthManager:
         """Get authenticated Google Sheets service"""
         if not self.is_authenticated():
             raise Exception("Not authenticated. Call authenticate() first.")
-        return self.sheets_service
\ No newline at end of file
+        return self.sheets_service
+    
+    def create_sheets_service(self):
+        """Build a separate Google Sheets service for use on a worker thread"""
+        if not self.is_authenticated():
+            raise Exception("Not authenticated. Call authenticate() first.")
+        return self._build_sheets_service()
+    
+    @contextmanager
+    def borrow_sheets_service(self):
+        """
+        Borrow a Sheets client for use on a worker thread and return it to the pool afterwards,
+        so its open connection is reused by the next worker instead of a new one being made
+        """
+        with self._sheets_pool_lock:
+            service = self._idle_sheets_services.pop() if self._idle_sheets_services else None
+        if service is None:
+            service = self.create_sheets_service()
+        
+        try:
+            yield service
+        finally:
+            with self._sheets_pool_lock:
+                if len(self._idle_sheets_services) < self.SHEETS_POOL_SIZE:
+                    self._idle_sheets_services.append(service)
+    
+    def _clear_sheets_pool(self):
+        """Drop pooled clients built with credentials that are no longer current"""
+        with self._sheets_pool_lock:
+            self._idle_sheets_services = []
+    
+    def _build_sheets_service(self):
+        """Build a Sheets client - each client owns its own (not thread-safe) HTTP connection"""
+        # One long-lived authorized Http per client keeps the TLS connection open between calls
+        http = AuthorizedHttp(self.creds, http=httplib2.Http(timeout=self.SHEETS_HTTP_TIMEOUT))
+        sheets_model = OrjsonModel() if ORJSON_AVAILABLE else None
+        return build('sheets', 'v4', http=http, cache_discovery=False, model=sheets_model)
\ No newline at end of file
@@ -4,10 +4,18 @@ Clean version using dedicated PDF parser service
 """
 
 import re
+import sys
+import copy
 import json
 import base64
+import time
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
+from dataclasses import dataclass, field, asdict
+from typing import Optional
 from googleapiclient.errors import HttpError
 from email.mime.text import MIMEText
 
@@ -37,15 +45,141 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# dataclass(slots=True) needs Python 3.10 - older interpreters get a regular dataclass
+DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**DATACLASS_OPTIONS)
+class TemperatureSummary:
+    """Summary of recent temperature data returned by get_temperature_summary"""
+    total_emails: int
+    total_readings: int
+    locations: list
+    alerts: list
+    latest_reading: Optional[dict]
+    discovered_locations: dict
+    sheets_logged: bool
+    sheets_message: str
+    message: str
+    sheets_pending: bool = False
+    emails_processed: int = 0
+    most_recent_email: Optional[dict] = None
+    all_readings: list = field(default_factory=list)
+    
+    # Dict-style access so existing callers keep working
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+    
+    def __contains__(self, key):
+        return key in self.__dataclass_fields__
+    
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+    
+    def to_dict(self):
+        """Plain dict for JSON serialization boundaries"""
+        return asdict(self)
+
+class SheetsWriteBatcher:
+    """
+    Coalesces sheet log requests that arrive while a write is in progress into one write.
+    A request made while nothing is being written is flushed straight away; requests that
+    arrive during a write are collected and flushed together as soon as it finishes, and
+    every waiting caller gets its own (success, message) result.
+    """
+    
+    def __init__(self, flush, max_readings=50):
+        """flush receives a list of pending entries and returns one result per entry"""
+        self.flush = flush
+        self.max_readings = max_readings
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pending = []
+        self._pending_readings = 0
+        self._collecting = False
+        self._flushing = False
+    
+    def submit(self, readings, locations, custom_logged_time=None):
+        """Queue a write and block until the batch containing it has been flushed"""
+        entry = {
+            'readings': readings,
+            'locations': locations,
+            'custom_logged_time': custom_logged_time,
+            'result': None,
+            'done': False
+        }
+        
+        with self._cond:
+            self._pending.append(entry)
+            self._pending_readings += len(readings)
+            
+            if self._collecting:
+                # Another caller is collecting this batch - wait for its flush
+                self._cond.notify_all()
+                while not entry['done']:
+                    self._cond.wait()
+                return entry['result']
+            
+            # This caller collects the batch and flushes it, waiting only while a write is running
+            self._collecting = True
+            while self._flushing and self._pending_readings < self.max_readings:
+                self._cond.wait()
+            
+            batch = self._pending
+            self._pending = []
+            self._pending_readings = 0
+            self._collecting = False
+        
+        # Flushes run one at a time so writes to the same sheet never interleave
+        with self._flush_lock:
+            with self._cond:
+                self._flushing = True
+            try:
+                results = self.flush(batch)
+            except Exception as e:
+                logger.error("Error flushing sheets batch: %s", e)
+                error_msg = f"Error flushing sheets batch: {e}"
+                results = [(False, error_msg)] * len(batch)
+            
+            with self._cond:
+                self._flushing = False
+                for pending_entry, result in zip(batch, results):
+                    pending_entry['result'] = result
+                    pending_entry['done'] = True
+                self._cond.notify_all()
+        
+        return entry['result']
+
 class GmailTemperatureService:
     """Service for handling temperature-related emails via Gmail API"""
     
+    # Seconds a location discovery summary is reused between polls
+    LOCATION_SUMMARY_TTL = 30
+    
+    # Seconds get_temperature_summary waits for a sheets write before reporting it as pending
+    SHEETS_INLINE_WAIT = 0.05
+    
+    # Parsed email details are reused across polls (Gmail message ids never change content)
+    EMAIL_CACHE_TTL = 3600
+    EMAIL_CACHE_SIZE = 2048
+    
+    # Seconds a messages.list result is reused for the same search query
+    SEARCH_CACHE_TTL = 60
+    
     def __init__(self, auth_manager, config_manager=None):
         """Initialize with authenticated Gmail service"""
         self.auth_manager = auth_manager
         self.config_manager = config_manager
         self.gmail_service = None
         self.last_check_time = None
+        self._loc_summary_cache = None  # (timestamp, version, payload)
+        self._cached_spreadsheet_id = None
+        self._cached_url = None
+        self._email_cache = OrderedDict()  # message_id -> (timestamp, email_info)
+        self._email_cache_lock = threading.Lock()
+        self._search_cache = {}  # (query, max_results) -> (timestamp, messages)
         
         # Initialize PDF parser
         if PDF_PARSER_AVAILABLE:
@@ -69,6 +203,11 @@ class GmailTemperatureService:
             self.sheets_service = None
             logger.warning("Sheets service not available")
         
+        # Concurrent sheet writes are merged into one batch per window
+        self._write_batcher = SheetsWriteBatcher(self._flush_writes)
+        # Sheets writes run off the summary path so polling isn't held up by the API
+        self._sheets_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='sheets-log')
+        
         # Temperature email patterns to search for
         self.temp_keywords = [
             'temperature',
@@ -96,6 +235,10 @@ class GmailTemperatureService:
             
             self.gmail_service = self.auth_manager.get_gmail_service()
             logger.info("Gmail service connected successfully")
+            
+            # Prime the sheets client in the background so the first log isn't slowed by setup
+            if self.sheets_service:
+                self._sheets_executor.submit(self.sheets_service.warmup)
             return True, "Gmail service connected"
             
         except Exception as e:
@@ -164,14 +307,17 @@ class GmailTemperatureService:
             query = ' '.join(query_parts)
             logger.info(f"Gmail search query: {query}")
             
-            # Search emails
-            results = self.gmail_service.users().messages().list(
-                userId='me',
-                q=query,
-                maxResults=max_results
-            ).execute()
-            
-            messages = results.get('messages', [])
+            # Search emails - a repeat of the same query within SEARCH_CACHE_TTL reuses the last listing
+            messages = self._get_cached_search(query, max_results)
+            if messages is None:
+                results = self.gmail_service.users().messages().list(
+                    userId='me',
+                    q=query,
+                    maxResults=max_results
+                ).execute()
+                
+                messages = results.get('messages', [])
+                self._store_cached_search(query, max_results, messages)
             logger.info(f"Found {len(messages)} potential temperature emails")
             
             # Get detailed email data with validation
@@ -267,7 +413,83 @@ class GmailTemperatureService:
             return False
 
     def get_email_details(self, message_id):
-        """Get detailed information from an email"""
+        """Get detailed information from an email, reusing a recent parse of the same message"""
+        cached = self._get_cached_email(message_id)
+        if cached is not None:
+            # Keep discovered locations current even when the parse is reused
+            pdf_locations = cached['pdf_data'].get('locations')
+            if self.location_manager and pdf_locations:
+                self.process_discovered_locations(pdf_locations)
+            logger.debug(f"Using cached details for message {message_id}")
+            return self._fresh_email_copy(cached)
+        
+        email_info = self._fetch_email_details(message_id)
+        if email_info is not None:
+            # Callers may modify the details, so the cache keeps its own copy
+            self._store_cached_email(message_id, copy.deepcopy(email_info))
+        return email_info
+    
+    @staticmethod
+    def _fresh_email_copy(email_info):
+        """Copy cached email details, stamping the readings with the current time as a new parse would"""
+        email_info = copy.deepcopy(email_info)
+        now = datetime.now()
+        for reading in email_info['temperature_data']['temperatures']:
+            reading['timestamp'] = now
+        daily_summary = email_info['pdf_data'].get('daily_summary')
+        if daily_summary:
+            daily_summary['date'] = now.date()
+        return email_info
+    
+    def _get_cached_email(self, message_id):
+        """Return cached email details if still fresh"""
+        with self._email_cache_lock:
+            entry = self._email_cache.get(message_id)
+            if entry is None:
+                return None
+            
+            cached_at, email_info = entry
+            if time.monotonic() - cached_at > self.EMAIL_CACHE_TTL:
+                del self._email_cache[message_id]
+                return None
+            
+            self._email_cache.move_to_end(message_id)
+            return email_info
+    
+    def _store_cached_email(self, message_id, email_info):
+        """Cache parsed email details, evicting the least recently used entry when full"""
+        with self._email_cache_lock:
+            self._email_cache[message_id] = (time.monotonic(), email_info)
+            self._email_cache.move_to_end(message_id)
+            while len(self._email_cache) > self.EMAIL_CACHE_SIZE:
+                self._email_cache.popitem(last=False)
+    
+    def _get_cached_search(self, query, max_results):
+        """Return the message list from a recent identical search, if any"""
+        with self._email_cache_lock:
+            entry = self._search_cache.get((query, max_results))
+            if entry is None or time.monotonic() - entry[0] > self.SEARCH_CACHE_TTL:
+                return None
+            return entry[1]
+    
+    def _store_cached_search(self, query, max_results, messages):
+        """Cache a search listing, dropping listings that have gone stale"""
+        now = time.monotonic()
+        with self._email_cache_lock:
+            self._search_cache = {
+                key: entry for key, entry in self._search_cache.items()
+                if now - entry[0] <= self.SEARCH_CACHE_TTL
+            }
+            self._search_cache[(query, max_results)] = (now, messages)
+    
+    def clear_email_cache(self):
+        """Drop cached searches and email parses so the next poll re-reads every message"""
+        with self._email_cache_lock:
+            self._email_cache.clear()
+            self._search_cache.clear()
+    
+    def _fetch_email_details(self, message_id):
+        """Fetch and parse an email from the Gmail API"""
         try:
             message = self.gmail_service.users().messages().get(
                 userId='me',
@@ -617,32 +839,29 @@ class GmailTemperatureService:
             self.location_manager.save_discovered_locations()
         except Exception as e:
             logger.error(f"Error saving discovered locations: {e}")
+        
+        self.invalidate_location_cache()
     
     def get_temperature_summary(self, hours_back=24, auto_log_to_sheets=True, custom_logged_time=None):
         """Get a summary of recent temperature data with optional sheets logging - USES ONLY MOST RECENT EMAIL"""
+        discovered = None
         try:
             emails, message = self.search_temperature_emails(hours_back)
             
+            # Discovery runs while emails are parsed, so take the summary once afterwards
+            discovered = self.get_location_discovery_summary()
+            
             if not emails:
-                return {
-                    'total_emails': 0,
-                    'total_readings': 0,
-                    'locations': [],
-                    'alerts': [],
-                    'latest_reading': None,
-                    'discovered_locations': self.get_location_discovery_summary(),
-                    'sheets_logged': False,
-                    'message': message
-                }
+                return self._empty_summary(message, discovered)
             
             # Use only the most recent email
-            logger.info(f"Found {len(emails)} temperature emails, using only the most recent")
+            logger.info("Found %d temperature emails, using only the most recent", len(emails))
             
             # Sort emails by date (newest first) and take only the first one
             sorted_emails = sorted(emails, key=lambda x: x['date'], reverse=True)
             most_recent_email = sorted_emails[0]
             
-            logger.info(f"Using most recent email: {most_recent_email['subject']} from {most_recent_email['date']}")
+            logger.info("Using most recent email: %s from %s", most_recent_email['subject'], most_recent_email['date'])
             
             # Process only the most recent email
             emails_to_process = [most_recent_email]
@@ -667,118 +886,231 @@ class GmailTemperatureService:
             
             # Auto-log to sheets if enabled and we have data
             sheets_logged = False
+            sheets_pending = False
             sheets_message = ""
             if auto_log_to_sheets and all_temperatures and self.sheets_service:
-                sheets_logged, sheets_message = self.log_temperatures_to_sheets(
+                future = self._sheets_executor.submit(
+                    self.log_temperatures_to_sheets,
                     all_temperatures, 
                     list(locations),
                     custom_logged_time=custom_logged_time
                 )
-            
-            summary = {
-                'total_emails': len(emails),  # Total found
-                'emails_processed': len(emails_to_process),  # Actually processed (1)
-                'most_recent_email': {
-                    'subject': most_recent_email['subject'],
+                try:
+                    # Best-effort inline result, otherwise let the write finish in the background
+                    sheets_logged, sheets_message = future.result(timeout=self.SHEETS_INLINE_WAIT)
+                except FutureTimeoutError:
+                    sheets_pending = True
+                    sheets_message = "Logging to sheets in background"
+                    future.add_done_callback(self._on_background_sheets_write)
+            
+            # Forwarded chains can carry very long subjects - keep the summary small
+            subject = most_recent_email.get('subject', '')[:200]
+            
+            summary = TemperatureSummary(
+                total_emails=len(emails),  # Total found
+                emails_processed=len(emails_to_process),  # Actually processed (1)
+                most_recent_email={
+                    'subject': subject,
                     'date': most_recent_email['date'].isoformat(),
                     'sender': most_recent_email['sender']
                 },
-                'total_readings': len(all_temperatures),
-                'locations': list(locations),
-                'alerts': list(set(all_alerts)),
-                'latest_reading': latest_reading,
-                'all_readings': all_temperatures,
-                'discovered_locations': self.get_location_discovery_summary(),
-                'sheets_logged': sheets_logged,
-                'sheets_message': sheets_message,
-                'message': f"Found {len(emails)} emails, processed most recent: {most_recent_email['subject']}"
-            }
+                total_readings=len(all_temperatures),
+                locations=list(locations),
+                alerts=list(set(all_alerts)),
+                latest_reading=latest_reading,
+                all_readings=all_temperatures,
+                discovered_locations=discovered,
+                sheets_logged=sheets_logged,
+                sheets_pending=sheets_pending,
+                sheets_message=sheets_message,
+                message=f"Found {len(emails)} emails, processed most recent: {subject}"
+            )
             
             return summary
             
         except Exception as e:
+            logger.error("Error getting temperature summary: %s", e)
             error_msg = f"Error getting temperature summary: {e}"
-            logger.error(error_msg)
-            return {
-                'total_emails': 0,
-                'total_readings': 0,
-                'locations': [],
-                'alerts': [],
-                'latest_reading': None,
-                'discovered_locations': self.get_location_discovery_summary(),
-                'sheets_logged': False,
-                'sheets_message': "",
-                'message': error_msg
-            }
+            return self._empty_summary(error_msg, discovered)
+    
+    def _empty_summary(self, message, discovered=None):
+        """Build a summary with no readings, reusing an already computed discovery summary"""
+        if discovered is None:
+            discovered = self.get_location_discovery_summary()
+        
+        return TemperatureSummary(
+            total_emails=0,
+            total_readings=0,
+            locations=[],
+            alerts=[],
+            latest_reading=None,
+            discovered_locations=discovered,
+            sheets_logged=False,
+            sheets_message="",
+            message=message
+        )
+    
+    def _on_background_sheets_write(self, future):
+        """Report the outcome of a sheets write that finished after the summary returned"""
+        try:
+            success, message = future.result()
+        except Exception as e:
+            logger.error("Background sheets write failed: %s", e)
+            return
+        
+        if success:
+            logger.info("Background sheets write completed: %s", message)
+        else:
+            logger.warning("Background sheets write failed: %s", message)
     
     def log_temperatures_to_sheets(self, temperature_readings, locations, custom_logged_time=None):
         """Log temperature readings to Google Sheets with optional custom logged time"""
+        if not temperature_readings:
+            return True, "No readings to log"
+        
+        if not self.sheets_service:
+            return False, "Sheets service not available"
+        
+        return self._write_batcher.submit(temperature_readings, locations, custom_logged_time)
+    
+    def _flush_writes(self, batch):
+        """Write a batch of queued log requests, one sheets write per logged time"""
+        groups = {}
+        for entry in batch:
+            readings, locations = groups.setdefault(entry['custom_logged_time'], ([], []))
+            readings.extend(entry['readings'])
+            locations.extend(entry['locations'])
+        
+        results = {}
+        for custom_logged_time, (readings, locations) in groups.items():
+            results[custom_logged_time] = self._write_temperatures_to_sheets(
+                readings, list(dict.fromkeys(locations)), custom_logged_time
+            )
+        
+        return [results[entry['custom_logged_time']] for entry in batch]
+    
+    def _write_temperatures_to_sheets(self, temperature_readings, locations, custom_logged_time=None):
+        """Perform a single sheets write for the given readings"""
         try:
-            if not self.sheets_service:
-                return False, "Sheets service not available"
-            
-            # Check if we have a spreadsheet configured
-            if not self.sheets_service.spreadsheet_id:
-                # Create a new spreadsheet with tabs for each location
-                logger.info("No spreadsheet configured, creating new one...")
-                spreadsheet, create_message = self.sheets_service.create_temperature_spreadsheet(locations)
-                if not spreadsheet:
-                    return False, f"Failed to create spreadsheet: {create_message}"
+            # Check if we have a spreadsheet configured (resolved once per process)
+            if self._cached_spreadsheet_id is None:
+                if not self.sheets_service.spreadsheet_id:
+                    # Create a new spreadsheet with tabs for each location
+                    logger.info("No spreadsheet configured, creating new one...")
+                    spreadsheet, create_message = self.sheets_service.create_temperature_spreadsheet(locations)
+                    if not spreadsheet:
+                        return False, f"Failed to create spreadsheet: {create_message}"
+                self._remember_spreadsheet()
+            
+            # Overlapping poll windows can queue the same reading more than once
+            unique_readings = self._unique_readings(temperature_readings)
+            if len(unique_readings) < len(temperature_readings):
+                logger.info("Dropped %d duplicate readings before logging", len(temperature_readings) - len(unique_readings))
             
             # Log the temperature readings with custom time
             success, log_message = self.sheets_service.log_temperature_readings(
-                temperature_readings, 
+                unique_readings, 
                 staff_name=None,  # Will be filled by staff confirmation
                 custom_logged_time=custom_logged_time
             )
             
+            time_note = f" at {custom_logged_time:%H:%M}" if custom_logged_time else ""
+            
             if success:
-                spreadsheet_url = self.sheets_service.get_spreadsheet_url()
-                time_note = f" at {custom_logged_time.strftime('%H:%M')}" if custom_logged_time else ""
-                logger.info(f"Temperature data logged to sheets{time_note}: {spreadsheet_url}")
+                # Logging may have replaced a deleted spreadsheet - keep the cache in step
+                self._remember_spreadsheet()
+                spreadsheet_url = self._cached_url
+                logger.info("Temperature data logged to sheets%s: %s", time_note, spreadsheet_url)
                 return True, f"Logged to sheets{time_note}: {log_message}"
             else:
                 return False, f"Failed to log to sheets: {log_message}"
             
         except Exception as e:
+            logger.error("Error logging to sheets: %s", e)
             error_msg = f"Error logging to sheets: {e}"
-            logger.error(error_msg)
             return False, error_msg
     
+    @staticmethod
+    def _unique_readings(temperature_readings):
+        """Drop readings with the same location, type, timestamp and value, keeping the first"""
+        seen = set()
+        unique = []
+        for reading in temperature_readings:
+            # A report's minimum and maximum share one timestamp and can have the same value
+            key = (reading.get('location'), reading.get('type'), reading.get('timestamp'), reading.get('value'))
+            if key in seen:
+                continue
+            seen.add(key)
+            unique.append(reading)
+        return unique
+    
+    def _remember_spreadsheet(self):
+        """Cache the sheets service's current spreadsheet id and URL"""
+        spreadsheet_id = self.sheets_service.spreadsheet_id
+        if spreadsheet_id != self._cached_spreadsheet_id:
+            self._cached_spreadsheet_id = spreadsheet_id
+            self._cached_url = self.sheets_service.get_spreadsheet_url()
+    
     def get_sheets_url(self):
         """Get the Google Sheets URL if available"""
         if self.sheets_service:
-            return self.sheets_service.get_spreadsheet_url()
+            # Only an id comparison unless the spreadsheet was replaced
+            self._remember_spreadsheet()
+            return self._cached_url
         return None
     
     def add_staff_confirmation_to_sheets(self, location, staff_name, date_str=None):
         """Add staff confirmation to sheets for a specific location"""
+        _, success, message = self.add_staff_confirmations_to_sheets([(location, staff_name, date_str)])[0]
+        return success, message
+    
+    def add_staff_confirmations_to_sheets(self, confirmations):
+        """Add staff confirmations for several (location, staff_name, date_str) tuples in one batch"""
         try:
             if not self.sheets_service:
-                return False, "Sheets service not available"
+                return [(location, False, "Sheets service not available") for location, _, _ in confirmations]
             
-            return self.sheets_service.add_staff_confirmation(location, staff_name, date_str)
+            return self.sheets_service.add_staff_confirmations(confirmations)
             
         except Exception as e:
+            logger.error("Error adding staff confirmation: %s", e)
             error_msg = f"Error adding staff confirmation: {e}"
-            logger.error(error_msg)
-            return False, error_msg
+            return [(location, False, error_msg) for location, _, _ in confirmations]
+    
+    def check_staff_confirmations_needed(self, locations, require_staff_confirmation=True):
+        """Check which locations still need today's staff confirmation, as {location: (needed, message)}"""
+        if not self.sheets_service:
+            return {location: (True, "Sheets service not available") for location in locations}
+        
+        return self.sheets_service.check_staff_confirmation_needed_bulk(locations, require_staff_confirmation)
+    
+    def invalidate_location_cache(self):
+        """Drop the cached location discovery summary"""
+        self._loc_summary_cache = None
     
     def get_location_discovery_summary(self):
-        """Get summary of discovered locations"""
+        """Get summary of discovered locations (cached for LOCATION_SUMMARY_TTL seconds)"""
         if not self.location_manager:
             return {'total_discovered': 0, 'unconfigured': []}
         
         try:
-            all_locations = self.location_manager.get_discovered_locations()
-            unconfigured = self.location_manager.get_unconfigured_locations()
+            version = self.location_manager.version
+            cached = self._loc_summary_cache
+            if cached:
+                cached_at, cached_version, payload = cached
+                if cached_version == version and time.monotonic() - cached_at < self.LOCATION_SUMMARY_TTL:
+                    return payload
             
-            return {
+            all_locations, unconfigured = self.location_manager.get_discovery_snapshot()
+            
+            payload = {
                 'total_discovered': len(all_locations),
                 'total_unconfigured': len(unconfigured),
                 'unconfigured': unconfigured,
                 'all_locations': all_locations
             }
+            self._loc_summary_cache = (time.monotonic(), version, payload)
+            return payload
         except Exception as e:
-            logger.error(f"Error getting location discovery summary: {e}")
+            logger.error("Error getting location discovery summary: %s", e)
             return {'total_discovered': 0, 'unconfigured': []}
@@ -4,22 +4,153 @@ Enhanced with Clever Logger format support and intelligent location discovery
 """
 
 import re
+import sys
 import json
 import logging
+from collections import deque, namedtuple
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 
-# Fuzzy matching libraries
+# Fuzzy matching libraries - prefer RapidFuzz (C++ scorers), fall back to fuzzywuzzy
 try:
-    from fuzzywuzzy import fuzz, process
+    from rapidfuzz import fuzz, process, utils
     FUZZY_AVAILABLE = True
+    RAPIDFUZZ_AVAILABLE = True
 except ImportError:
-    FUZZY_AVAILABLE = False
+    RAPIDFUZZ_AVAILABLE = False
+    try:
+        from fuzzywuzzy import fuzz, process
+        FUZZY_AVAILABLE = True
+    except ImportError:
+        FUZZY_AVAILABLE = False
+
+# Aho-Corasick keyword scanning (optional - plain substring checks are used without it)
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# RE2 matches in linear time, so garbled PDF lines can't trigger regex backtracking (optional)
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+    re2 = None
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Ranking used when merging duplicate locations
+CONFIDENCE_PRIORITY = {'high': 3, 'medium': 2, 'low': 1}
+TYPE_PRIORITY = {'vaccine': 5, 'insulin': 4, 'fridge': 3, 'freezer': 3, 'room': 2, 'custom': 1}
+
+# Confidence signals as bit flags, with the points each one is worth
+CONF_TEMP_TERMS = 1       # temperature / temp / monitoring
+CONF_EQUIPMENT = 2        # fridge / refrigerator / freezer
+CONF_PHARMACY_TERMS = 4   # vaccine / medicine / drug / pharmacy
+CONF_TEMP_VALUE = 8       # a temperature value on the line
+CONF_REPORT_TERMS = 16    # daily / report / summary / log
+CONF_CLEAR_NAME = 32      # main / primary / backup / vaccine / storage in the name
+CONF_GENERIC_NAME = 64    # bare fridge / room / area / storage
+CONF_PDF_SOURCE = 128     # found in a PDF
+CONFIDENCE_FLAG_POINTS = {
+    CONF_TEMP_TERMS: 20, CONF_EQUIPMENT: 25, CONF_PHARMACY_TERMS: 20, CONF_TEMP_VALUE: 15,
+    CONF_REPORT_TERMS: 10, CONF_CLEAR_NAME: 15, CONF_GENERIC_NAME: -15, CONF_PDF_SOURCE: 10,
+}
+CONFIDENCE_CATEGORY_FLAGS = {
+    'temp_terms': CONF_TEMP_TERMS,
+    'equipment': CONF_EQUIPMENT,
+    'pharmacy_terms': CONF_PHARMACY_TERMS,
+    'report_terms': CONF_REPORT_TERMS,
+}
+GENERIC_LOCATION_NAMES = frozenset({'fridge', 'room', 'area', 'storage'})
+
+def _confidence_for_flags(flags: int) -> str:
+    """Confidence level for a combination of confidence flags (base score 30)"""
+    score = 30 + sum(points for flag, points in CONFIDENCE_FLAG_POINTS.items() if flags & flag)
+    if score >= 70:
+        return 'high'
+    elif score >= 45:
+        return 'medium'
+    return 'low'
+
+# Every flag combination scored up front
+CONFIDENCE_BY_FLAGS = tuple(_confidence_for_flags(flags) for flags in range(256))
+
+# Every location pattern needs one of these words, so lines without any are skipped cheaply
+LOCATION_KEYWORD_RE = re.compile(r'fridge|ref|freezer|room|area|zone|storage|cabinet|sensor|probe|channel|monitor')
+
+# Clever Logger field labels that are never a location name
+CLEVER_LOGGER_LABELS = frozenset({'Description', 'Device', 'Device Model', 'Log Interval', 'View Location', 'Temperature'})
+CLEVER_LOGGER_DESCRIPTION_STOPS = frozenset({'Device', 'Device Model'})
+CLEVER_LOGGER_NAME_LOOKAHEAD = 4  # Lines after a Name label searched for its value
+
+# Words dropped from location names
+FILLER_WORDS = frozenset({'the', 'a', 'an', 'of', 'for', 'at', 'in', 'on'})
+
+# Canonical spelling for common location terms
+NAME_STANDARDIZATIONS = {
+    'fridge': 'Fridge',
+    'refrigerator': 'Fridge', 
+    'ref': 'Fridge',
+    'freezer': 'Freezer',
+    'room': 'Room',
+    'area': 'Area',
+    'zone': 'Zone',
+    'storage': 'Storage',
+    'vaccine': 'Vaccine',
+    'medicine': 'Medicine',
+    'drug': 'Drug',
+    'pharmacy': 'Pharmacy',
+    'main': 'Main',
+    'primary': 'Primary',
+    'central': 'Central',
+    'backup': 'Backup'
+}
+
+# Keyword groups used by the location type and confidence classifiers
+KEYWORD_CATEGORIES = {
+    'cl_fridge': ('fridge', 'refrigerator', 'vaccine', 'medicine', 'drug'),
+    'cl_vaccine': ('vaccine', 'immunization'),
+    'cl_freezer': ('freezer', 'frozen'),
+    'cl_room': ('room', 'dispensary', 'pharmacy', 'office', 'storage'),
+    'fridge': ('fridge', 'refrigerator'),
+    'fridge_vaccine': ('vaccine', 'insulin'),
+    'freezer': ('freezer',),
+    'room': ('room', 'area', 'zone'),
+    'vaccine': ('vaccine',),
+    'insulin': ('insulin',),
+    'controlled': ('controlled', 'schedule'),
+    'temp_terms': ('temperature', 'temp', 'monitoring'),
+    'equipment': ('fridge', 'refrigerator', 'freezer'),
+    'pharmacy_terms': ('vaccine', 'medicine', 'drug', 'pharmacy'),
+    'report_terms': ('daily', 'report', 'summary', 'log'),
+}
+
+# Patterns reused on every call are compiled once
+CELSIUS_VALUE_RE = re.compile(r'(\d+\.?\d*)\s*°C')
+TEMP_VALUE_RE = re.compile(r'\d+\.?\d*\s*[°]?[cf]')
+CLEAR_NAME_RE = re.compile(r'(main|primary|backup|vaccine|storage)')
+MIN_THRESHOLD_RE = re.compile(r'min(?:imum)?[:\s]*([+-]?\d+\.?\d*)')
+MAX_THRESHOLD_RE = re.compile(r'max(?:imum)?[:\s]*([+-]?\d+\.?\d*)')
+RANGE_THRESHOLD_RES = (
+    re.compile(r'([+-]?\d+\.?\d*)\s*[°]?[cf]?\s*[-–—]\s*([+-]?\d+\.?\d*)\s*[°]?[cf]?'),
+    re.compile(r'between\s+([+-]?\d+\.?\d*)\s+and\s+([+-]?\d+\.?\d*)'),
+    re.compile(r'from\s+([+-]?\d+\.?\d*)\s+to\s+([+-]?\d+\.?\d*)'),
+)
+
+# Location found during text extraction - converted to a dict when returned
+LocationRecord = namedtuple(
+    'LocationRecord',
+    'name type confidence min_temp max_temp description context source line_number'
+)
+
+# dataclass(slots=True) needs Python 3.10 - older interpreters get a regular dataclass
+DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**DATACLASS_OPTIONS)
 class LocationInfo:
     """Data class for location information"""
     name: str
@@ -44,6 +175,8 @@ class LocationManager:
         """Initialize location manager"""
         self.config_manager = config_manager
         self.discovered_locations = {}  # Dict[str, LocationInfo]
+        self.version = 0  # Bumped whenever discovered locations change
+        self._lower_to_key = {}  # Lowercased location key -> key, for fuzzy lookups
         
         # Enhanced location patterns for better detection
         self.location_patterns = [
@@ -70,6 +203,24 @@ class LocationManager:
             r'(vaccine|insulin|medication)\s*(?:storage|fridge|cabinet)',
             r'(controlled|schedule)\s*(?:drug|substance)\s*(?:storage|cabinet)',
         ]
+        # Patterns are lowercase and only ever run against lowercased lines, so no case folding is needed
+        pattern_engine = re2 if RE2_AVAILABLE else re
+        self._compiled_patterns = [pattern_engine.compile(p) for p in self.location_patterns]
+        # One scan tells us whether any pattern can match a line at all
+        self._union_re = pattern_engine.compile('|'.join(f'(?:{p})' for p in self.location_patterns))
+        
+        # keyword -> categories it belongs to, scanned in a single pass per text
+        self._keyword_index = {}
+        for category, terms in KEYWORD_CATEGORIES.items():
+            for term in terms:
+                self._keyword_index.setdefault(term, set()).add(category)
+        if AHOCORASICK_AVAILABLE:
+            self._keyword_automaton = ahocorasick.Automaton()
+            for term, categories in self._keyword_index.items():
+                self._keyword_automaton.add_word(term, frozenset(categories))
+            self._keyword_automaton.make_automaton()
+        else:
+            self._keyword_automaton = None
         
         # Temperature threshold hints by location type
         self.default_thresholds = {
@@ -96,24 +247,52 @@ class LocationManager:
         if not text:
             return []
         
+        # Both extractors share one split of the text
+        lines = text.splitlines()
+        
         # Try Clever Logger format first
-        clever_logger_locations = self.extract_clever_logger_locations(text, filename)
-        if clever_logger_locations:
-            return clever_logger_locations
+        if 'Location Details' in text:
+            clever_logger_locations = self._extract_clever_logger_lines(lines, filename)
+            if clever_logger_locations:
+                return clever_logger_locations
         
         # Fallback to original pattern-based extraction
-        return self.extract_locations_from_text_fallback(text, filename)
+        return self._extract_fallback_lines(lines, filename)
     
     def extract_clever_logger_locations(self, text: str, filename: str = "") -> List[Dict]:
         """Extract locations from Clever Logger format PDFs"""
-        locations_found = []
-        lines = text.split('\n')
-        current_location_info = None
+        # Every location starts with a Location Details header
+        if 'Location Details' not in text:
+            return []
+        
+        return self._extract_clever_logger_lines(text.splitlines(), filename)
+    
+    def _extract_clever_logger_lines(self, lines: List[str], filename: str = "") -> List[Dict]:
+        """Extract Clever Logger locations from already split lines"""
+        locations_found: List[LocationRecord] = []
+        current_location_info: Optional[Dict[str, str]] = None
+        recent_lines: deque = deque(maxlen=3)  # This line and the two before it
+        name_lines_left: int = 0  # Lines left to find the value of a Name label
+        expect_description: bool = False  # Previous line was a Description label
         
         for line_num, line in enumerate(lines):
-            original_line = line
+            recent_lines.append(line)
             line = line.strip()
             
+            # Values follow their label, so fill in anything the previous lines asked for
+            if name_lines_left:
+                name_lines_left -= 1
+                if (line and line not in CLEVER_LOGGER_LABELS and
+                        not line.startswith(('S/N:', 'CLT-'))):
+                    if current_location_info is not None:
+                        current_location_info['name'] = line
+                    name_lines_left = 0
+            
+            if expect_description:
+                expect_description = False
+                if line and line not in CLEVER_LOGGER_DESCRIPTION_STOPS and current_location_info is not None:
+                    current_location_info['description'] = line
+            
             if not line:
                 continue
             
@@ -125,35 +304,23 @@ class LocationManager:
             # Extract location information from structured format
             if current_location_info is not None:
                 if line.startswith('Name') and 'name' not in current_location_info:
-                    # Get location name from next non-empty line
-                    for next_idx in range(line_num + 1, min(line_num + 5, len(lines))):
-                        if next_idx < len(lines):
-                            next_line = lines[next_idx].strip()
-                            if (next_line and 
-                                next_line not in ['Description', 'Device', 'Device Model', 'Log Interval', 'View Location', 'Temperature'] and
-                                not next_line.startswith('S/N:') and 
-                                not next_line.startswith('CLT-')):
-                                current_location_info['name'] = next_line
-                                break
+                    # Location name is on one of the next non-empty lines
+                    name_lines_left = CLEVER_LOGGER_NAME_LOOKAHEAD
                 
                 elif line.startswith('Description'):
-                    # Get description from next line
-                    if line_num + 1 < len(lines):
-                        desc = lines[line_num + 1].strip()
-                        if desc and desc not in ['Device', 'Device Model']:
-                            current_location_info['description'] = desc
+                    # Description is on the next line
+                    expect_description = True
                 
-                elif 'Alarm Threshold' in line and 'Low Temperature' in ' '.join(lines[max(0, line_num-2):line_num+1]):
-                    # Extract low temperature threshold
-                    temp_match = re.search(r'(\d+\.?\d*)\s*°C', line)
-                    if temp_match:
-                        current_location_info['min_temp'] = float(temp_match.group(1))
-                
-                elif 'Alarm Threshold' in line and 'High Temperature' in ' '.join(lines[max(0, line_num-2):line_num+1]):
-                    # Extract high temperature threshold  
-                    temp_match = re.search(r'(\d+\.?\d*)\s*°C', line)
-                    if temp_match:
-                        current_location_info['max_temp'] = float(temp_match.group(1))
+                elif 'Alarm Threshold' in line:
+                    # Thresholds are kept as matched text and converted once the location is complete
+                    if any('Low Temperature' in recent for recent in recent_lines):
+                        temp_match = CELSIUS_VALUE_RE.search(line)
+                        if temp_match:
+                            current_location_info['min_temp'] = temp_match.group(1)
+                    elif any('High Temperature' in recent for recent in recent_lines):
+                        temp_match = CELSIUS_VALUE_RE.search(line)
+                        if temp_match:
+                            current_location_info['max_temp'] = temp_match.group(1)
                 
                 # End of location section - process collected info
                 elif line == 'Temperature' and 'name' in current_location_info:
@@ -166,44 +333,46 @@ class LocationManager:
                     # Determine confidence (high for structured Clever Logger data)
                     confidence = 'high'
                     
-                    location_info = {
-                        'name': location_name,
-                        'type': location_type,
-                        'confidence': confidence,
-                        'min_temp': current_location_info.get('min_temp'),
-                        'max_temp': current_location_info.get('max_temp'),
-                        'description': description,
-                        'context': f"Clever Logger device: {location_name}",
-                        'source': filename,
-                        'line_number': line_num + 1
-                    }
+                    min_temp = current_location_info.get('min_temp')
+                    max_temp = current_location_info.get('max_temp')
                     
-                    locations_found.append(location_info)
+                    locations_found.append(LocationRecord(
+                        name=location_name,
+                        type=location_type,
+                        confidence=confidence,
+                        min_temp=float(min_temp) if min_temp is not None else None,
+                        max_temp=float(max_temp) if max_temp is not None else None,
+                        description=description,
+                        context=f"Clever Logger device: {location_name}",
+                        source=filename,
+                        line_number=line_num + 1
+                    ))
                     logger.info(f"Extracted Clever Logger location: {location_name} ({location_type})")
                     
                     # Reset for next location
                     current_location_info = None
         
-        return self.deduplicate_locations(locations_found)
+        return self.deduplicate_location_records(locations_found)
     
     def determine_clever_logger_location_type(self, location_name: str, description: str = "") -> str:
         """Determine location type for Clever Logger devices"""
         name_lower = location_name.lower()
         desc_lower = description.lower()
         combined = f"{name_lower} {desc_lower}".strip()
+        hits = self.match_keyword_categories(combined)
         
         # Check for fridge/refrigeration indicators
-        if any(term in combined for term in ['fridge', 'refrigerator', 'vaccine', 'medicine', 'drug']):
-            if any(term in combined for term in ['vaccine', 'immunization']):
+        if 'cl_fridge' in hits:
+            if 'cl_vaccine' in hits:
                 return 'vaccine'
             return 'fridge'
         
         # Check for freezer indicators
-        if any(term in combined for term in ['freezer', 'frozen']):
+        if 'cl_freezer' in hits:
             return 'freezer'
         
         # Check for room temperature indicators
-        if any(term in combined for term in ['room', 'dispensary', 'pharmacy', 'office', 'storage']):
+        if 'cl_room' in hits:
             return 'room'
         
         # Default based on typical temperature ranges (will be determined from actual readings)
@@ -211,21 +380,27 @@ class LocationManager:
     
     def extract_locations_from_text_fallback(self, text: str, filename: str = "") -> List[Dict]:
         """Fallback location extraction method (original implementation)"""
+        return self._extract_fallback_lines(text.splitlines(), filename)
+    
+    def _extract_fallback_lines(self, lines: List[str], filename: str = "") -> List[Dict]:
+        """Pattern-based location extraction from already split lines"""
         locations_found = []
-        lines = text.split('\n')
         
-        for line_num, line in enumerate(lines):
-            original_line = line
-            line = line.strip().lower()
+        for line_num, original_line in enumerate(lines):
+            line_lower = original_line.strip().lower()
             
-            if not line:
+            if not line_lower:
                 continue
             
+            if not LOCATION_KEYWORD_RE.search(line_lower) or not self._union_re.search(line_lower):
+                continue
+            
+            context_lower = None  # Built on the first match in this line
+            line_thresholds = {}  # location type -> thresholds found in this line's context
+            
             # Try each location pattern
-            for pattern in self.location_patterns:
-                matches = re.finditer(pattern, line, re.IGNORECASE)
-                
-                for match in matches:
+            for pattern in self._compiled_patterns:
+                for match in pattern.finditer(line_lower):
                     # Extract location name from match groups
                     location_parts = [group for group in match.groups() if group and group.strip()]
                     
@@ -240,28 +415,31 @@ class LocationManager:
                         continue
                     
                     # Determine location type and confidence
-                    location_type = self.determine_location_type(original_line, location_name)
-                    confidence = self.calculate_confidence(original_line, location_name, filename)
+                    location_type = self.determine_location_type(line_lower, location_name)
+                    confidence = self.calculate_confidence(line_lower, location_name, filename)
                     
                     # Extract context around this location for temperature thresholds
-                    context = self.get_line_context(lines, line_num, 3)
-                    temp_thresholds = self.extract_location_thresholds(context, location_type)
-                    
-                    location_info = {
-                        'name': location_name,
-                        'type': location_type,
-                        'confidence': confidence,
-                        'min_temp': temp_thresholds.get('min'),
-                        'max_temp': temp_thresholds.get('max'),
-                        'context': original_line[:100],
-                        'source': filename,
-                        'line_number': line_num + 1
-                    }
+                    if context_lower is None:
+                        context_lower = self.get_line_context(lines, line_num, 3).lower()
+                    temp_thresholds = line_thresholds.get(location_type)
+                    if temp_thresholds is None:
+                        temp_thresholds = self.extract_location_thresholds(context_lower, location_type)
+                        line_thresholds[location_type] = temp_thresholds
                     
-                    locations_found.append(location_info)
+                    locations_found.append(LocationRecord(
+                        name=location_name,
+                        type=location_type,
+                        confidence=confidence,
+                        min_temp=temp_thresholds.get('min'),
+                        max_temp=temp_thresholds.get('max'),
+                        description=None,
+                        context=original_line[:100],
+                        source=filename,
+                        line_number=line_num + 1
+                    ))
         
         # Deduplicate and merge similar locations
-        unique_locations = self.deduplicate_locations(locations_found)
+        unique_locations = self.deduplicate_location_records(locations_found)
         
         logger.info(f"Extracted {len(unique_locations)} unique locations from text")
         return unique_locations
@@ -274,115 +452,75 @@ class LocationManager:
         # Clean up the name
         name = raw_name.strip().lower()
         
-        # Remove common filler words
-        filler_words = ['the', 'a', 'an', 'of', 'for', 'at', 'in', 'on']
-        words = [w for w in name.split() if w not in filler_words]
-        
-        if not words:
-            return ""
-        
-        # Standardize common terms
-        standardizations = {
-            'fridge': 'Fridge',
-            'refrigerator': 'Fridge', 
-            'ref': 'Fridge',
-            'freezer': 'Freezer',
-            'room': 'Room',
-            'area': 'Area',
-            'zone': 'Zone',
-            'storage': 'Storage',
-            'vaccine': 'Vaccine',
-            'medicine': 'Medicine',
-            'drug': 'Drug',
-            'pharmacy': 'Pharmacy',
-            'main': 'Main',
-            'primary': 'Primary',
-            'central': 'Central',
-            'backup': 'Backup'
-        }
-        
-        # Apply standardizations
-        standardized_words = []
-        for word in words:
-            standardized_words.append(standardizations.get(word, word.title()))
+        # Remove common filler words and standardize common terms
+        words = [NAME_STANDARDIZATIONS.get(w) or w.title() for w in name.split() if w not in FILLER_WORDS]
         
-        return ' '.join(standardized_words)
+        return ' '.join(words)
     
-    def determine_location_type(self, line: str, location_name: str) -> str:
-        """Determine the type of location based on context"""
-        line_lower = line.lower()
+    def determine_location_type(self, line_lower: str, location_name: str) -> str:
+        """Determine the type of location based on context (line_lower must already be lowercased)"""
         name_lower = location_name.lower()
+        hits = self.match_keyword_categories(line_lower) | self.match_keyword_categories(name_lower)
         
         # Check for specific type indicators
-        if any(term in line_lower or term in name_lower for term in ['fridge', 'refrigerator']):
-            if any(term in line_lower or term in name_lower for term in ['vaccine', 'insulin']):
+        if 'fridge' in hits:
+            if 'fridge_vaccine' in hits:
                 return 'vaccine'
             return 'fridge'
         
-        if any(term in line_lower or term in name_lower for term in ['freezer']):
+        if 'freezer' in hits:
             return 'freezer'
         
-        if any(term in line_lower or term in name_lower for term in ['room', 'area', 'zone']):
+        if 'room' in hits:
             return 'room'
         
-        if any(term in line_lower or term in name_lower for term in ['vaccine']):
+        if 'vaccine' in hits:
             return 'vaccine'
         
-        if any(term in line_lower or term in name_lower for term in ['insulin']):
+        if 'insulin' in hits:
             return 'insulin'
         
-        if any(term in line_lower or term in name_lower for term in ['controlled', 'schedule']):
+        if 'controlled' in hits:
             return 'controlled'
         
         return 'custom'
     
-    def calculate_confidence(self, line: str, location_name: str, filename: str = "") -> str:
-        """Calculate confidence score for location detection"""
-        score = 0
-        
-        # Base score for finding a location
-        score += 30
-        
-        # Bonus for explicit location indicators
-        line_lower = line.lower()
-        if any(term in line_lower for term in ['temperature', 'temp', 'monitoring']):
-            score += 20
-        
-        # Bonus for specific location types
-        if any(term in line_lower for term in ['fridge', 'refrigerator', 'freezer']):
-            score += 25
-        
-        # Bonus for pharmacy-specific terms
-        if any(term in line_lower for term in ['vaccine', 'medicine', 'drug', 'pharmacy']):
-            score += 20
-        
-        # Bonus for temperature values nearby
-        if re.search(r'\d+\.?\d*\s*[°]?[cf]', line_lower):
-            score += 15
+    def match_keyword_categories(self, text: str) -> set:
+        """Get the keyword categories (see KEYWORD_CATEGORIES) whose terms appear in lowercased text"""
+        hits = set()
+        if self._keyword_automaton is not None:
+            for _, categories in self._keyword_automaton.iter(text):
+                hits.update(categories)
+        else:
+            for term, categories in self._keyword_index.items():
+                if term in text:
+                    hits.update(categories)
+        return hits
+    
+    def calculate_confidence(self, line_lower: str, location_name: str, filename: str = "") -> str:
+        """Calculate confidence score for location detection (line_lower must already be lowercased)"""
+        name_lower = location_name.lower()
         
-        # Bonus for structured report indicators
-        if any(term in line_lower for term in ['daily', 'report', 'summary', 'log']):
-            score += 10
+        # Keyword signals from a single scan of the line
+        flags = 0
+        for category in self.match_keyword_categories(line_lower):
+            flags |= CONFIDENCE_CATEGORY_FLAGS.get(category, 0)
         
-        # Bonus for clear naming patterns
-        if re.search(r'(main|primary|backup|vaccine|storage)', location_name.lower()):
-            score += 15
+        # Temperature values nearby
+        if TEMP_VALUE_RE.search(line_lower):
+            flags |= CONF_TEMP_VALUE
         
-        # Penalty for very generic names
-        if location_name.lower() in ['fridge', 'room', 'area', 'storage']:
-            score -= 15
+        # Clear naming patterns, or a very generic name
+        if CLEAR_NAME_RE.search(name_lower):
+            flags |= CONF_CLEAR_NAME
+        if name_lower in GENERIC_LOCATION_NAMES:
+            flags |= CONF_GENERIC_NAME
         
-        # Bonus for PDF source (usually more structured)
+        # PDF sources are usually more structured
         if filename.lower().endswith('.pdf'):
-            score += 10
+            flags |= CONF_PDF_SOURCE
         
-        # Convert score to confidence level
-        if score >= 70:
-            return 'high'
-        elif score >= 45:
-            return 'medium'
-        else:
-            return 'low'
+        return CONFIDENCE_BY_FLAGS[flags]
     
     def get_line_context(self, lines: List[str], line_num: int, context_size: int = 3) -> str:
         """Get context around a specific line for better analysis"""
@@ -396,18 +534,16 @@ class LocationManager:
         
         return ' '.join(context_lines)
     
-    def extract_location_thresholds(self, context: str, location_type: str) -> Dict[str, Optional[float]]:
-        """Extract temperature thresholds specific to this location"""
+    def extract_location_thresholds(self, context_lower: str, location_type: str) -> Dict[str, Optional[float]]:
+        """Extract temperature thresholds specific to this location (context_lower must already be lowercased)"""
         thresholds = {'min': None, 'max': None}
         
-        if not context:
+        if not context_lower:
             return thresholds
         
-        context_lower = context.lower()
-        
         # Look for explicit min/max statements
-        min_match = re.search(r'min(?:imum)?[:\s]*([+-]?\d+\.?\d*)', context_lower)
-        max_match = re.search(r'max(?:imum)?[:\s]*([+-]?\d+\.?\d*)', context_lower)
+        min_match = MIN_THRESHOLD_RE.search(context_lower)
+        max_match = MAX_THRESHOLD_RE.search(context_lower)
         
         if min_match:
             try:
@@ -422,14 +558,8 @@ class LocationManager:
                 pass
         
         # Look for range patterns "2°C - 8°C" or "between 2 and 8"
-        range_patterns = [
-            r'([+-]?\d+\.?\d*)\s*[°]?[cf]?\s*[-–—]\s*([+-]?\d+\.?\d*)\s*[°]?[cf]?',
-            r'between\s+([+-]?\d+\.?\d*)\s+and\s+([+-]?\d+\.?\d*)',
-            r'from\s+([+-]?\d+\.?\d*)\s+to\s+([+-]?\d+\.?\d*)'
-        ]
-        
-        for pattern in range_patterns:
-            range_match = re.search(pattern, context_lower)
+        for pattern in RANGE_THRESHOLD_RES:
+            range_match = pattern.search(context_lower)
             if range_match:
                 try:
                     temp1 = float(range_match.group(1))
@@ -455,27 +585,55 @@ class LocationManager:
         if not locations:
             return locations
         
-        unique_locations = []
-        seen_names = set()
+        unique_by_key = {}  # Insertion order keeps the first occurrence's position
         
         for location in locations:
-            location_name = location['name']
-            
             # Only remove exact duplicates (same name, same source)
-            location_key = (location_name, location.get('source', ''))
+            location_key = (location['name'], location.get('source', ''))
             
-            if location_key not in seen_names:
-                seen_names.add(location_key)
-                unique_locations.append(location)
+            existing = unique_by_key.get(location_key)
+            if existing is None:
+                unique_by_key[location_key] = location
             else:
                 # Merge info if exact duplicate found
-                for existing in unique_locations:
-                    if (existing['name'] == location_name and 
-                        existing.get('source') == location.get('source')):
-                        self.merge_location_info(existing, location)
-                        break
+                self.merge_location_info(existing, location)
         
-        return unique_locations
+        return list(unique_by_key.values())
+    
+    def deduplicate_location_records(self, records: List[LocationRecord]) -> List[Dict]:
+        """Deduplicate extracted location records like deduplicate_locations and return them as dicts"""
+        unique_by_key = {}
+        
+        for record in records:
+            location_key = (record.name, record.source)
+            existing = unique_by_key.get(location_key)
+            if existing is None:
+                unique_by_key[location_key] = record
+            else:
+                unique_by_key[location_key] = self.merge_location_record(existing, record)
+        
+        return [record._asdict() for record in unique_by_key.values()]
+    
+    def merge_location_record(self, existing: LocationRecord, new: LocationRecord) -> LocationRecord:
+        """Record version of merge_location_info - returns the merged record"""
+        changes = {}
+        
+        if new.confidence == 'high' and existing.confidence != 'high':
+            changes['name'] = new.name
+        
+        if CONFIDENCE_PRIORITY.get(new.confidence, 0) > CONFIDENCE_PRIORITY.get(existing.confidence, 0):
+            changes['confidence'] = new.confidence
+        
+        if new.min_temp is not None and existing.min_temp is None:
+            changes['min_temp'] = new.min_temp
+        
+        if new.max_temp is not None and existing.max_temp is None:
+            changes['max_temp'] = new.max_temp
+        
+        if TYPE_PRIORITY.get(new.type, 0) > TYPE_PRIORITY.get(existing.type, 0):
+            changes['type'] = new.type
+        
+        return existing._replace(**changes) if changes else existing
     
     def merge_location_info(self, existing: Dict, new: Dict):
         """Merge information from two similar locations"""
@@ -484,8 +642,7 @@ class LocationManager:
             existing['name'] = new['name']
         
         # Use the better confidence score
-        confidence_priority = {'high': 3, 'medium': 2, 'low': 1}
-        if confidence_priority.get(new['confidence'], 0) > confidence_priority.get(existing['confidence'], 0):
+        if CONFIDENCE_PRIORITY.get(new['confidence'], 0) > CONFIDENCE_PRIORITY.get(existing['confidence'], 0):
             existing['confidence'] = new['confidence']
         
         # Use more specific temperature thresholds if available
@@ -496,8 +653,7 @@ class LocationManager:
             existing['max_temp'] = new['max_temp']
         
         # Prefer more specific location types
-        type_priority = {'vaccine': 5, 'insulin': 4, 'fridge': 3, 'freezer': 3, 'room': 2, 'custom': 1}
-        if type_priority.get(new['type'], 0) > type_priority.get(existing['type'], 0):
+        if TYPE_PRIORITY.get(new['type'], 0) > TYPE_PRIORITY.get(existing['type'], 0):
             existing['type'] = new['type']
     
     def register_discovered_location(self, location_info: Dict) -> str:
@@ -512,10 +668,10 @@ class LocationManager:
             existing_location.source_count += 1
             
             # Update confidence if better
-            confidence_priority = {'high': 3, 'medium': 2, 'low': 1}
-            if confidence_priority.get(location_info['confidence'], 0) > confidence_priority.get(existing_location.confidence, 0):
+            if CONFIDENCE_PRIORITY.get(location_info['confidence'], 0) > CONFIDENCE_PRIORITY.get(existing_location.confidence, 0):
                 existing_location.confidence = location_info['confidence']
             
+            self.version += 1
             logger.info(f"Updated existing location: {location_name}")
             return location_name
         else:
@@ -529,6 +685,8 @@ class LocationManager:
             )
             
             self.discovered_locations[location_name] = new_location
+            self._lower_to_key.setdefault(location_name.lower(), location_name)
+            self.version += 1
             logger.info(f"Registered new location: {location_name}")
             return location_name
     
@@ -545,12 +703,13 @@ class LocationManager:
         target_location.last_seen = max(source_location.last_seen, target_location.last_seen)
         
         # Use better confidence
-        confidence_priority = {'high': 3, 'medium': 2, 'low': 1}
-        if confidence_priority.get(source_location.confidence, 0) > confidence_priority.get(target_location.confidence, 0):
+        if CONFIDENCE_PRIORITY.get(source_location.confidence, 0) > CONFIDENCE_PRIORITY.get(target_location.confidence, 0):
             target_location.confidence = source_location.confidence
         
         # Remove source location
         del self.discovered_locations[source_key]
+        self._forget_lower_key(source_key)
+        self.version += 1
         
         logger.info(f"Merged location '{source_key}' into '{target_key}' by user choice")
         return True
@@ -560,48 +719,65 @@ class LocationManager:
         if not FUZZY_AVAILABLE or not self.discovered_locations:
             return []
         
-        existing_names = list(self.discovered_locations.keys())
-        matches = process.extract(location_name.lower(), 
-                                [name.lower() for name in existing_names], 
-                                limit=3)
+        choices = list(self._lower_to_key)
+        if RAPIDFUZZ_AVAILABLE:
+            matches = process.extract(location_name.lower(), choices, scorer=fuzz.WRatio,
+                                      processor=utils.default_process, limit=3, score_cutoff=threshold)
+        else:
+            matches = process.extract(location_name.lower(), choices, limit=3)
         
         potential_matches = []
         for match in matches:
             if match[1] >= threshold and match[1] < 95:  # Don't include near-exact matches
-                # Find the original key
-                for key in existing_names:
-                    if key.lower() == match[0]:
-                        location = self.discovered_locations[key]
-                        potential_matches.append({
-                            'key': key,
-                            'name': location.name,
-                            'similarity': match[1],
-                            'type': location.location_type,
-                            'configured': location.configured
-                        })
-                        break
+                key = self._lower_to_key[match[0]]
+                location = self.discovered_locations[key]
+                potential_matches.append({
+                    'key': key,
+                    'name': location.name,
+                    'similarity': round(match[1]),
+                    'type': location.location_type,
+                    'configured': location.configured
+                })
         
         return potential_matches
     
     def find_similar_location(self, location_name: str, threshold: int = 95) -> Optional[str]:
         """Find very similar existing location (only near-exact matches)"""
+        name_lower = location_name.lower()
+        
+        # Exact (case-insensitive) matches don't need fuzzy scoring
+        exact_key = self._lower_to_key.get(name_lower)
+        if exact_key is not None:
+            return exact_key
+        
         if not FUZZY_AVAILABLE or not self.discovered_locations:
             return None
         
-        existing_names = list(self.discovered_locations.keys())
+        choices = list(self._lower_to_key)
         
         # Only match very high similarity to avoid false positives
-        matches = process.extractOne(location_name.lower(), 
-                                   [name.lower() for name in existing_names])
+        if RAPIDFUZZ_AVAILABLE:
+            matches = process.extractOne(name_lower, choices, scorer=fuzz.WRatio,
+                                         processor=utils.default_process, score_cutoff=threshold)
+        else:
+            matches = process.extractOne(name_lower, choices)
         
         if matches and matches[1] >= threshold:
-            # Find the exact key that matched
-            for key in existing_names:
-                if key.lower() == matches[0]:
-                    return key
+            return self._lower_to_key[matches[0]]
         
         return None
     
+    def _forget_lower_key(self, removed_key: str):
+        """Drop a removed key from the lowercase index, falling back to another key with the same spelling"""
+        lower = removed_key.lower()
+        if self._lower_to_key.get(lower) != removed_key:
+            return
+        del self._lower_to_key[lower]
+        for key in self.discovered_locations:
+            if key.lower() == lower:
+                self._lower_to_key[lower] = key
+                break
+    
     def get_discovered_locations(self) -> Dict[str, Dict]:
         """Get all discovered locations as dictionary"""
         result = {}
@@ -627,6 +803,7 @@ class LocationManager:
             location.location_type = config.get('type', location.location_type)
             location.min_temp = config.get('min_temp', location.min_temp)
             location.max_temp = config.get('max_temp', location.max_temp)
+            self.version += 1
             
             logger.info(f"Marked location as configured: {location_key}")
             return True
@@ -662,11 +839,48 @@ class LocationManager:
                         source_count=data.get('source_count', 1)
                     )
                     self.discovered_locations[key] = location
+                    self._lower_to_key.setdefault(key.lower(), key)
+                self.version += 1
             else:
                 logger.info("No config manager - starting with empty discovered locations")
         except Exception as e:
             logger.warning(f"Could not load discovered locations: {e}")
     
+    def get_discovery_snapshot(self) -> Tuple[Dict[str, Dict], List[Dict]]:
+        """Get all discovered locations and the unconfigured subset in a single pass"""
+        all_locations = {}
+        unconfigured = []
+        for key, location in self.discovered_locations.items():
+            all_locations[key] = {
+                'name': location.name,
+                'confidence': location.confidence,
+                'configured': location.configured,
+                'type': location.location_type,
+                'min_temp': location.min_temp,
+                'max_temp': location.max_temp,
+                'first_seen': location.first_seen,
+                'last_seen': location.last_seen,
+                'source_count': location.source_count
+            }
+            if not location.configured:
+                unconfigured.append({
+                    'key': key,
+                    'name': location.name,
+                    'confidence': location.confidence,
+                    'type': location.location_type,
+                    'min_temp': location.min_temp,
+                    'max_temp': location.max_temp,
+                    'source_count': location.source_count
+                })
+        
+        # Sort by confidence and source count
+        unconfigured.sort(key=lambda x: (
+            CONFIDENCE_PRIORITY[x['confidence']], 
+            x['source_count']
+        ), reverse=True)
+        
+        return all_locations, unconfigured
+    
     def get_unconfigured_locations(self) -> List[Dict]:
         """Get locations that need user configuration"""
         unconfigured = []
@@ -684,7 +898,7 @@ class LocationManager:
         
         # Sort by confidence and source count
         unconfigured.sort(key=lambda x: (
-            {'high': 3, 'medium': 2, 'low': 1}[x['confidence']], 
+            CONFIDENCE_PRIORITY[x['confidence']], 
             x['source_count']
         ), reverse=True)
         
@@ -6,33 +6,77 @@ Clean, dedicated service for parsing Clever Logger temperature PDFs
 
 import re
 import io
+import os
+import copy
+import math
+import time
+import hashlib
 import logging
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from itertools import islice
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator, Union
 
-# PDF processing libraries
+# PDF processing libraries - PyPDF2 preferred, PyMuPDF (MuPDF C engine) and pdfplumber as fallbacks
 try:
-    import PyPDF2
-    PDF_AVAILABLE = True
+    import pymupdf
+    PYMUPDF_AVAILABLE = True
 except ImportError:
     try:
-        import pdfplumber
-        PDF_AVAILABLE = True
+        import fitz as pymupdf  # PyMuPDF releases before 1.24.3
+        PYMUPDF_AVAILABLE = True
     except ImportError:
-        PDF_AVAILABLE = False
+        PYMUPDF_AVAILABLE = False
+
+try:
+    import PyPDF2
+    PYPDF2_AVAILABLE = True
+except ImportError:
+    PYPDF2_AVAILABLE = False
+
+try:
+    import pdfplumber
+    PDFPLUMBER_AVAILABLE = True
+except ImportError:
+    PDFPLUMBER_AVAILABLE = False
+
+PDF_AVAILABLE = PYMUPDF_AVAILABLE or PYPDF2_AVAILABLE or PDFPLUMBER_AVAILABLE
 
 logger = logging.getLogger(__name__)
 
+# Compiled once - these run on every line of every page
+TEMP_PAIR_RE = re.compile(r'(\d+\.\d+)°C\s+(\d+\.\d+)°C')  # "4.0°C 4.8°C" recording columns
+DEVICE_SN_RE = re.compile(r'Device S/N:\s*(\d+)')
+TEMP_C_RE = re.compile(r'(\d+\.?\d*)\s*°C')
+ANY_TEMP_RE = re.compile(r'\d+\.?\d*\s*°C')
+NAME_RE = re.compile(r'Name(?:\s+(\S.*?))?\s*$')  # "Name" or "Name Dispensary", not "Namespace"
+
+# Field labels in the Location Details block that can never be a location name
+FIELD_LABELS = frozenset({'Description', 'Device', 'Device Model', 'Log Interval', 'View Location'})
+NAME_EXCLUDED_LABELS = FIELD_LABELS | {'Temperature'}
+NAME_STOP_LABELS = frozenset({'Description', 'Device', 'Device Model'})  # Name search stops here
+DEVICE_LABELS = frozenset({'Device', 'Device Model'})
+SERIAL_PREFIXES = ('S/N:', 'CLT-')
+NAME_EXCLUDED_PREFIXES = SERIAL_PREFIXES + ('Device S/N:',)
+
 class PDFTemperatureParser:
     """
     Clean, focused parser for Clever Logger temperature PDFs
     Handles the exact format: Location Details -> Name -> Recordings
     """
     
+    # Parsed results of recently seen PDFs, keyed on a hash of their content
+    RESULT_CACHE_TTL = 3600
+    RESULT_CACHE_SIZE = 32
+    
     def __init__(self):
         """Initialize the PDF parser"""
         if not PDF_AVAILABLE:
-            logger.warning("No PDF processing library available. Install PyPDF2 or pdfplumber.")
+            logger.warning("No PDF processing library available. Install PyMuPDF, PyPDF2 or pdfplumber.")
+        
+        self._result_cache = OrderedDict()  # (digest, filename) -> (timestamp, result)
+        self._result_cache_lock = threading.Lock()
     
     def parse_pdf_data(self, pdf_data: bytes, filename: str = "report.pdf") -> Dict:
         """
@@ -45,17 +89,28 @@ class PDFTemperatureParser:
         Returns:
             Dict with locations, temperatures, and summary data
         """
+        # The same report is often re-sent or retried - skip the parse if we have seen these bytes
+        cache_key = (hashlib.blake2b(pdf_data, digest_size=16).digest(), filename)
+        cached_result = self._get_cached_result(cache_key)
+        if cached_result is not None:
+            logger.debug(f"Using cached parse result for '{filename}'")
+            return cached_result
+        
+        result = self._parse_pdf(pdf_data, filename)
+        if result['success']:
+            self._store_cached_result(cache_key, result)
+        return result
+    
+    def _parse_pdf(self, pdf_data: Union[bytes, str], filename: str) -> Dict:
+        """Extract and parse the PDF content (uncached) from PDF bytes or a file path"""
         try:
-            # Extract text from PDF
-            text_content = self._extract_text_from_pdf(pdf_data)
+            # Parse the structured content page by page as the text is extracted
+            locations, temperatures, text_stats = self._parse_all(self._iter_page_lines(pdf_data))
             
-            if not text_content.strip():
+            if not text_stats['text_lines']:
                 logger.warning(f"No text extracted from PDF: {filename}")
                 return self._empty_result()
             
-            # Parse the structured content
-            locations = self._extract_locations(text_content)
-            temperatures = self._extract_temperatures(text_content, locations)
             daily_summary = self._create_daily_summary(temperatures, filename)
             
             result = {
@@ -63,7 +118,7 @@ class PDFTemperatureParser:
                 'temperatures': temperatures,
                 'daily_summary': daily_summary,
                 'source': filename,
-                'text_length': len(text_content),
+                'text_length': text_stats['text_length'],
                 'success': True
             }
             
@@ -74,150 +129,264 @@ class PDFTemperatureParser:
             logger.error(f"Error parsing PDF '{filename}': {e}")
             return self._empty_result(error=str(e))
     
+    def _get_cached_result(self, cache_key: Tuple[bytes, str]) -> Optional[Dict]:
+        """Return a copy of a cached parse result if still fresh"""
+        with self._result_cache_lock:
+            entry = self._result_cache.get(cache_key)
+            if entry is None:
+                return None
+            
+            cached_at, result = entry
+            if time.monotonic() - cached_at > self.RESULT_CACHE_TTL:
+                del self._result_cache[cache_key]
+                return None
+            
+            self._result_cache.move_to_end(cache_key)
+        
+        # Callers may modify the result, so never hand out the cached objects
+        result = copy.deepcopy(result)
+        
+        # Stamp the readings with the current time as a new parse would, so a report
+        # re-sent after midnight is summarized under the new date
+        now = datetime.now()
+        for temperature in result['temperatures']:
+            temperature['timestamp'] = now
+        if result['daily_summary']:
+            result['daily_summary']['date'] = now.date()
+        return result
+    
+    def _store_cached_result(self, cache_key: Tuple[bytes, str], result: Dict):
+        """Cache a parse result, evicting the least recently used entry when full"""
+        result = copy.deepcopy(result)
+        with self._result_cache_lock:
+            self._result_cache[cache_key] = (time.monotonic(), result)
+            self._result_cache.move_to_end(cache_key)
+            while len(self._result_cache) > self.RESULT_CACHE_SIZE:
+                self._result_cache.popitem(last=False)
+    
+    def clear_result_cache(self):
+        """Forget all cached parse results"""
+        with self._result_cache_lock:
+            self._result_cache.clear()
+    
     def _extract_text_from_pdf(self, pdf_data: bytes) -> str:
         """Extract text content from PDF bytes"""
-        if not PDF_AVAILABLE:
-            raise Exception("No PDF processing library available")
+        return "".join(self._iter_page_texts(pdf_data))
+    
+    def _iter_page_lines(self, pdf_data: Union[bytes, str]) -> Iterator[Tuple[int, str]]:
+        """Yield (page_num, line) for every line of the PDF text, holding one page at a time"""
+        pending = ""
+        page_num = 0
         
-        text_content = ""
+        for page_num, page_text in enumerate(self._iter_page_texts(pdf_data), 1):
+            page_lines = page_text.split('\n')
+            # Carry the unfinished last line over so the result matches splitting the full text
+            page_lines[0] = pending + page_lines[0]
+            pending = page_lines.pop()
+            for line in page_lines:
+                yield page_num, line
         
-        try:
-            # Try PyPDF2 first
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_data))
-            logger.debug(f"PDF has {len(pdf_reader.pages)} pages")
-            
-            for page_num, page in enumerate(pdf_reader.pages):
-                page_text = page.extract_text()
-                text_content += f"\n--- PAGE {page_num + 1} ---\n"
-                text_content += page_text + "\n"
-                
-        except Exception as e:
-            logger.warning(f"PyPDF2 failed: {e}")
-            # Try pdfplumber as fallback
-            try:
-                import pdfplumber
-                with pdfplumber.open(io.BytesIO(pdf_data)) as pdf:
-                    logger.debug(f"PDF has {len(pdf.pages)} pages (pdfplumber)")
-                    for page_num, page in enumerate(pdf.pages):
-                        page_text = page.extract_text()
-                        text_content += f"\n--- PAGE {page_num + 1} ---\n"
-                        text_content += (page_text or "") + "\n"
-            except Exception as e2:
-                logger.error(f"Both PDF libraries failed: {e2}")
-                raise Exception(f"PDF parsing failed: PyPDF2 ({e}), pdfplumber ({e2})")
-        
-        return text_content
+        yield page_num, pending
     
-    def _extract_locations(self, text_content: str) -> List[Dict]:
+    def _iter_page_texts(self, pdf_data: Union[bytes, str]) -> Iterator[str]:
         """
-        Extract location information from PDF text
-        Looks for 'Location Details' sections and extracts the 'Name' field
+        Yield the text of each PDF page, falling back to the next library if one fails.
+        pdf_data may also be a file path, which every library opens itself.
         """
-        locations = []
-        lines = text_content.split('\n')
+        if not PDF_AVAILABLE:
+            raise Exception("No PDF processing library available")
         
-        for line_num, line in enumerate(lines):
-            line = line.strip()
+        # PyPDF2 first - its text layout is the one checked against real Clever Logger reports -
+        # then PyMuPDF and pdfplumber. PyPDF2 and pdfplumber need a stream over in-memory data
+        extractors = []
+        if PYPDF2_AVAILABLE:
+            extractors.append(('PyPDF2', self._iter_pages_with_pypdf2, True))
+        if PYMUPDF_AVAILABLE:
+            extractors.append(('PyMuPDF', self._iter_pages_with_pymupdf, False))
+        if PDFPLUMBER_AVAILABLE:
+            extractors.append(('pdfplumber', self._iter_pages_with_pdfplumber, True))
+        
+        pages_done = 0
+        errors = []
+        pdf_stream = None
+        
+        for library, iter_pages, needs_stream in extractors:
+            if isinstance(pdf_data, str) or not needs_stream:
+                source = pdf_data
+            else:
+                # Copied into a stream only once a library that needs one runs
+                if pdf_stream is None:
+                    pdf_stream = io.BytesIO(pdf_data)
+                pdf_stream.seek(0)
+                source = pdf_stream
+            try:
+                # Resume after the pages a failed library already produced
+                for page_num, page_text in iter_pages(source, pages_done):
+                    yield f"\n--- PAGE {page_num + 1} ---\n" + (page_text or "") + "\n"
+                    pages_done = page_num + 1
+                return
+            except Exception as e:
+                logger.warning(f"{library} failed: {e}")
+                errors.append(f"{library} ({e})")
+        
+        logger.error(f"All PDF libraries failed: {', '.join(errors)}")
+        raise Exception(f"PDF parsing failed: {', '.join(errors)}")
+    
+    def _iter_pages_with_pymupdf(self, source: Union[bytes, str], start_page: int = 0) -> Iterator[Tuple[int, str]]:
+        """Yield (page_num, text) for each page with PyMuPDF, from PDF bytes or a file path"""
+        if isinstance(source, str):
+            doc = pymupdf.open(source, filetype="pdf")
+        else:
+            doc = pymupdf.open(stream=source, filetype="pdf")
+        try:
+            logger.debug(f"PDF has {doc.page_count} pages (PyMuPDF)")
             
-            # Look for 'Location Details' section start
-            if line == 'Location Details':
-                # Process this location section using the proven logic above
-                continue
+            for page_num in range(start_page, doc.page_count):
+                # sort=True rebuilds table rows by baseline - plain extraction puts each
+                # separately drawn cell on its own line, so "4.0°C 4.8°C" pairs never match
+                yield page_num, doc[page_num].get_text("text", sort=True)
+        finally:
+            doc.close()
+    
+    def _iter_pages_with_pypdf2(self, pdf_stream: Union[io.BytesIO, str], start_page: int = 0) -> Iterator[Tuple[int, str]]:
+        """Yield (page_num, text) for each page with PyPDF2"""
+        pdf_reader = PyPDF2.PdfReader(pdf_stream)
+        logger.debug(f"PDF has {len(pdf_reader.pages)} pages")
         
-        logger.info(f"Extracted {len(locations)} locations from PDF")
-        return locations
+        for page_num in range(start_page, len(pdf_reader.pages)):
+            yield page_num, pdf_reader.pages[page_num].extract_text()
+    
+    def _iter_pages_with_pdfplumber(self, pdf_stream: Union[io.BytesIO, str], start_page: int = 0) -> Iterator[Tuple[int, str]]:
+        """Yield (page_num, text) for each page with pdfplumber"""
+        with pdfplumber.open(pdf_stream) as pdf:
+            logger.debug(f"PDF has {len(pdf.pages)} pages (pdfplumber)")
+            for page_num in range(start_page, len(pdf.pages)):
+                yield page_num, pdf.pages[page_num].extract_text()
     
-    def _extract_locations(self, text_content: str) -> List[Dict]:
+    def _parse_all(self, page_lines: Iterable[Tuple[int, str]]) -> Tuple[List[Dict], List[Dict], Dict]:
         """
-        Extract location information from PDF text - using proven test parser logic
+        Extract locations and temperature readings in a single pass over the PDF text.
+        Location details use the proven test parser logic; temperatures are grouped
+        under the Name field only.
+        
+        Args:
+            page_lines: (page_num, line) pairs as produced by _iter_page_lines
+            
+        Returns:
+            (locations, temperatures, text_stats)
         """
         locations_found = []
-        lines = text_content.split('\n')
+        location_temperatures = {}  # Running min/max and count per location
+        text_stats = {'text_length': -1, 'text_lines': 0}
+        debug = logger.isEnabledFor(logging.DEBUG)  # Skip building log messages per line when not needed
+        
+        # Local bindings for the calls made on every line - saves a global and attribute lookup each time
+        match_name = NAME_RE.match
+        find_temp_pairs = TEMP_PAIR_RE.finditer
+        
+        # Location details state
         current_location_info = None
         
-        for line_num, line in enumerate(lines):
-            original_line = line
+        # Temperature recordings state
+        current_location = None
+        in_recordings_section = False
+        
+        # Raw text of the two lines before the current one (alarm threshold context)
+        prev2 = prev1 = current = ''
+        
+        for line_num, (page_num, line, following) in enumerate(self._with_lookahead(page_lines, 2)):
+            prev2, prev1, current = prev1, current, line
+            text_stats['text_length'] += len(line) + 1
             line = line.strip()
             
             if not line:
                 continue
             
+            text_stats['text_lines'] += 1
+            name_match = match_name(line)
+            
+            # --- Location details ---
+            
             # Look for Location Details sections
             if line == 'Location Details':
                 current_location_info = {}
-                logger.debug(f"Found 'Location Details' at line {line_num}")
-                continue
+                if debug:
+                    logger.debug(f"Found 'Location Details' at line {line_num} (page {page_num})")
             
             # Extract location information from structured format
-            if current_location_info is not None:
-                if line.startswith('Name') and 'name' not in current_location_info:
-                    logger.debug(f"Found 'Name' line at {line_num}: '{line}'")
+            elif current_location_info is not None:
+                if name_match and 'name' not in current_location_info:
+                    if debug:
+                        logger.debug(f"Found 'Name' line at {line_num}: '{line}'")
                     
                     # Check if name is on the same line: "Name Dispensary"
-                    if len(line) > 4:  # More than just "Name"
-                        name_part = line[4:].strip()  # Everything after "Name"
-                        if (name_part and 
-                            name_part not in ['Description', 'Device', 'Device Model', 'Log Interval', 'View Location'] and
-                            not name_part.startswith('S/N:') and 
-                            not name_part.startswith('CLT-') and
-                            len(name_part) < 50):
-                            current_location_info['name'] = name_part
+                    name_part = name_match.group(1) or ''  # Everything after "Name"
+                    if (name_part and 
+                        name_part not in FIELD_LABELS and
+                        not name_part.startswith(SERIAL_PREFIXES) and
+                        len(name_part) < 50):
+                        current_location_info['name'] = name_part
+                        if debug:
                             logger.debug(f"  ✅ Name from same line: '{name_part}'")
-                            continue
-                    
-                    # If not on same line, look for name in next non-empty line ONLY
-                    for next_idx in range(line_num + 1, min(line_num + 3, len(lines))):
-                        if next_idx < len(lines):
-                            next_line = lines[next_idx].strip()
-                            logger.debug(f"  Checking line {next_idx}: '{next_line}'")
+                    else:
+                        # If not on same line, look for name in next non-empty line ONLY
+                        for offset, next_line in enumerate(following, 1):
+                            next_line = next_line.strip()
+                            if debug:
+                                logger.debug(f"  Checking line {line_num + offset}: '{next_line}'")
                             if (next_line and 
-                                next_line not in ['Description', 'Device', 'Device Model', 'Log Interval', 'View Location', 'Temperature'] and
-                                not next_line.startswith('S/N:') and 
-                                not next_line.startswith('CLT-') and
-                                not next_line.startswith('Device S/N:') and
+                                next_line not in NAME_EXCLUDED_LABELS and
+                                not next_line.startswith(NAME_EXCLUDED_PREFIXES) and
                                 len(next_line) < 50):
                                 current_location_info['name'] = next_line
-                                logger.debug(f"  ✅ Name from next line: '{next_line}'")
+                                if debug:
+                                    logger.debug(f"  ✅ Name from next line: '{next_line}'")
                                 break
-                            elif next_line in ['Description', 'Device', 'Device Model']:
-                                logger.debug(f"  ❌ Stopping search at field: '{next_line}'")
+                            elif next_line in NAME_STOP_LABELS:
+                                if debug:
+                                    logger.debug(f"  ❌ Stopping search at field: '{next_line}'")
                                 break
                 
                 # Extract Description (this will be used to determine final location name)
                 elif line.startswith('Description'):
                     # Get description from next line
-                    if line_num + 1 < len(lines):
-                        desc = lines[line_num + 1].strip()
-                        if desc and desc not in ['Device', 'Device Model']:
+                    if following:
+                        desc = following[0].strip()
+                        if desc and desc not in DEVICE_LABELS:
                             current_location_info['description'] = desc
-                            logger.debug(f"  Description: '{desc}'")
+                            if debug:
+                                logger.debug(f"  Description: '{desc}'")
                 
                 elif line.startswith('Device S/N:'):
-                    sn_match = re.search(r'Device S/N:\s*(\d+)', line)
+                    sn_match = DEVICE_SN_RE.search(line)
                     if sn_match:
                         current_location_info['device_sn'] = sn_match.group(1)
-                        logger.debug(f"  Device S/N: {sn_match.group(1)}")
+                        if debug:
+                            logger.debug(f"  Device S/N: {sn_match.group(1)}")
                 
-                elif 'Alarm Threshold' in line and 'Low Temperature' in ' '.join(lines[max(0, line_num-2):line_num+1]):
+                elif 'Alarm Threshold' in line and ('Low Temperature' in line or 'Low Temperature' in prev1 or 'Low Temperature' in prev2):
                     # Extract low temperature threshold
-                    temp_match = re.search(r'(\d+\.?\d*)\s*°C', line)
-                    if temp_match:
-                        current_location_info['min_temp_threshold'] = float(temp_match.group(1))
-                        logger.debug(f"  Min temp: {temp_match.group(1)}°C")
+                    threshold = self._find_celsius_value(line)
+                    if threshold is not None:
+                        current_location_info['min_temp_threshold'] = threshold
+                        if debug:
+                            logger.debug(f"  Min temp: {threshold}°C")
                 
-                elif 'Alarm Threshold' in line and 'High Temperature' in ' '.join(lines[max(0, line_num-2):line_num+1]):
+                elif 'Alarm Threshold' in line and ('High Temperature' in line or 'High Temperature' in prev1 or 'High Temperature' in prev2):
                     # Extract high temperature threshold  
-                    temp_match = re.search(r'(\d+\.?\d*)\s*°C', line)
-                    if temp_match:
-                        current_location_info['max_temp_threshold'] = float(temp_match.group(1))
-                        logger.debug(f"  Max temp: {temp_match.group(1)}°C")
+                    threshold = self._find_celsius_value(line)
+                    if threshold is not None:
+                        current_location_info['max_temp_threshold'] = threshold
+                        if debug:
+                            logger.debug(f"  Max temp: {threshold}°C")
                 
                 # End of location section - process collected info
                 elif line == 'Temperature' and 'name' in current_location_info:
                     # ONLY use the Name field, completely ignore Description
                     location_name = current_location_info['name'].strip()
                     
-                    logger.debug(f"✅ LOCATION FOUND: '{location_name}' (using Name only)")
+                    if debug:
+                        logger.debug(f"✅ LOCATION FOUND: '{location_name}' (using Name only)")
                     
                     location_info = {
                         'name': location_name,
@@ -234,26 +403,8 @@ class PDFTemperatureParser:
                     
                     # Reset for next location
                     current_location_info = None
-        
-        logger.info(f"Extracted {len(locations_found)} locations from PDF")
-        return locations_found
-    
-    def _extract_temperatures(self, text_content: str, locations: List[Dict]) -> List[Dict]:
-        """
-        Extract temperature readings for each location - using Name field only
-        """
-        temperatures = []
-        lines = text_content.split('\n')
-        current_location = None
-        in_recordings_section = False
-        location_temperatures = {}  # Track all temps per location
-        
-        for line_num, line in enumerate(lines):
-            original_line = line
-            line = line.strip()
             
-            if not line:
-                continue
+            # --- Temperature recordings ---
             
             # Look for Location Details sections
             if line.startswith('Location Details'):
@@ -262,78 +413,113 @@ class PDFTemperatureParser:
                 continue
             
             # Extract location name from "Name" field in Location Details
-            if line.startswith('Name') and not current_location:
+            if name_match and not current_location:
                 # Look for the location name (same logic as location extraction)
                 location_name = None
                 
                 # Check if name is on same line
-                if len(line) > 4:
-                    name_part = line[4:].strip()
-                    if (name_part and 
-                        name_part not in ['Description', 'Device', 'Device Model'] and
-                        len(name_part) < 50):
-                        location_name = name_part
+                name_part = name_match.group(1)
+                if (name_part and 
+                    name_part not in NAME_STOP_LABELS and
+                    len(name_part) < 50):
+                    location_name = name_part
                 
                 # If not on same line, look for name in next line
                 if not location_name:
-                    for next_line_idx in range(line_num + 1, min(line_num + 3, len(lines))):
-                        if next_line_idx < len(lines):
-                            next_line = lines[next_line_idx].strip()
-                            if (next_line and 
-                                next_line not in ['Description', 'Device', 'Device Model', 'Log Interval', 'View Location', 'Temperature'] and
-                                not next_line.startswith('S/N:') and 
-                                not next_line.startswith('CLT-')):
-                                location_name = next_line
-                                break
+                    for next_line in following:
+                        next_line = next_line.strip()
+                        if (next_line and 
+                            next_line not in NAME_EXCLUDED_LABELS and
+                            not next_line.startswith(SERIAL_PREFIXES)):
+                            location_name = next_line
+                            break
                 
                 # Use the location name directly (no transformation)
                 if location_name:
                     current_location = location_name.strip()
-                    location_temperatures[current_location] = {'mins': [], 'maxs': []}
-                    logger.debug(f"Processing temperatures for: {current_location}")
+                    location_temperatures[current_location] = {'min': math.inf, 'max': -math.inf, 'count': 0}
+                    if debug:
+                        logger.debug(f"Processing temperatures for: {current_location}")
                 continue
             
             # Look for start of Recordings section
             if line == 'Recordings' and current_location:
                 in_recordings_section = True
-                logger.debug(f"Found Recordings section for {current_location}")
+                if debug:
+                    logger.debug(f"Found Recordings section for {current_location}")
                 continue
             
             # Parse temperature recordings table
             if in_recordings_section and current_location:
                 # Look for lines with temperature data: "2025/08/14 05:59PM 4.0°C 4.8°C"
-                temp_pattern = r'(\d+\.\d+)°C\s+(\d+\.\d+)°C'
-                temp_matches = re.findall(temp_pattern, line)
-                
-                if temp_matches:
-                    logger.debug(f"Found temp data in line {line_num}: {line[:50]}...")
+                temp_data = location_temperatures[current_location]
                 
-                for min_temp_str, max_temp_str in temp_matches:
-                    try:
-                        min_temp = float(min_temp_str)
-                        max_temp = float(max_temp_str)
-                        
-                        # Skip unrealistic temperatures
-                        if min_temp < -50 or min_temp > 100 or max_temp < -50 or max_temp > 100:
-                            continue
-                        
-                        location_temperatures[current_location]['mins'].append(min_temp)
-                        location_temperatures[current_location]['maxs'].append(max_temp)
-                        
-                    except ValueError:
+                for temp_match in find_temp_pairs(line):
+                    # The pattern only matches digits and a decimal point, so float() cannot fail
+                    min_temp = float(temp_match.group(1))
+                    max_temp = float(temp_match.group(2))
+                    if debug:
+                        logger.debug(f"Found temp data in line {line_num}: {min_temp}°C {max_temp}°C")
+                    
+                    # Skip unrealistic temperatures
+                    if min_temp < -50 or min_temp > 100 or max_temp < -50 or max_temp > 100:
                         continue
-            
-            # Also check for end of current location section
-            if line.startswith('Location Details') and current_location:
-                in_recordings_section = False
+                    
+                    # Keep running totals rather than every reading
+                    if min_temp < temp_data['min']:
+                        temp_data['min'] = min_temp
+                    if max_temp > temp_data['max']:
+                        temp_data['max'] = max_temp
+                    temp_data['count'] += 1
+        
+        logger.info(f"Extracted {len(locations_found)} locations from PDF")
+        
+        temperatures = self._build_temperature_readings(location_temperatures)
+        return locations_found, temperatures, text_stats
+    
+    @staticmethod
+    def _find_celsius_value(line: str) -> Optional[float]:
+        """Return the first <number> °C value in a line, e.g. 8.0 for 'Alarm Threshold 8.0 °C'"""
+        # Fast path: read the number just before the first °C without the regex engine
+        end = line.find('°C')
+        if end > 0:
+            while end > 0 and line[end - 1].isspace():
+                end -= 1
+            start = end
+            while start > 0 and (line[start - 1].isdecimal() or line[start - 1] == '.'):
+                start -= 1
+            token = line[start:end]
+            if token and token[0].isdecimal() and token.count('.') <= 1:
+                return float(token)
+        
+        # Anything unusual (stray dots, no number before the first °C) goes through the regex
+        temp_match = TEMP_C_RE.search(line)
+        return float(temp_match.group(1)) if temp_match else None
+    
+    @staticmethod
+    def _with_lookahead(page_lines: Iterable[Tuple[int, str]], size: int) -> Iterator[Tuple[int, str, Tuple[str, ...]]]:
+        """Yield (page_num, line, following) where following holds up to `size` upcoming lines"""
+        page_lines = iter(page_lines)
+        window = deque(islice(page_lines, size + 1))
+        
+        while window:
+            page_num, line = window.popleft()
+            yield page_num, line, tuple(next_line for _, next_line in window)
+            window.extend(islice(page_lines, 1))
+    
+    def _build_temperature_readings(self, location_temperatures: Dict[str, Dict]) -> List[Dict]:
+        """Turn the readings collected per location into absolute min/max temperature readings"""
+        temperatures = []
+        now = datetime.now()  # All readings from one report share a timestamp
         
         # Calculate absolute min/max for each location
         for location_name, temp_data in location_temperatures.items():
-            if temp_data['mins'] and temp_data['maxs']:
-                absolute_min = min(temp_data['mins'])
-                absolute_max = max(temp_data['maxs'])
+            if temp_data['count']:
+                absolute_min = temp_data['min']
+                absolute_max = temp_data['max']
+                reading_count = temp_data['count']
                 
-                logger.debug(f"{location_name}: {len(temp_data['mins'])} readings, Min {absolute_min}°C, Max {absolute_max}°C")
+                logger.debug(f"{location_name}: {reading_count} readings, Min {absolute_min}°C, Max {absolute_max}°C")
                 
                 # Create temperature readings for absolute min and max
                 temperatures.extend([
@@ -342,18 +528,18 @@ class PDFTemperatureParser:
                         'unit': 'C',
                         'type': 'minimum',
                         'location': location_name,
-                        'context': f'Daily minimum from {len(temp_data["mins"])} readings',
-                        'timestamp': datetime.now(),
-                        'reading_count': len(temp_data['mins'])
+                        'context': f'Daily minimum from {reading_count} readings',
+                        'timestamp': now,
+                        'reading_count': reading_count
                     },
                     {
                         'value': absolute_max,
                         'unit': 'C',
                         'type': 'maximum', 
                         'location': location_name,
-                        'context': f'Daily maximum from {len(temp_data["maxs"])} readings',
-                        'timestamp': datetime.now(),
-                        'reading_count': len(temp_data['maxs'])
+                        'context': f'Daily maximum from {reading_count} readings',
+                        'timestamp': now,
+                        'reading_count': reading_count
                     }
                 ])
         
@@ -365,32 +551,35 @@ class PDFTemperatureParser:
         if not temperatures:
             return None
         
-        # Group by location
+        # Group by location, keeping running extremes rather than lists of values
         by_location = {}
         for temp in temperatures:
             location = temp['location']
             if location not in by_location:
-                by_location[location] = {'mins': [], 'maxs': []}
+                by_location[location] = {'min': math.inf, 'max': -math.inf, 'min_count': 0, 'max_count': 0}
             
+            data = by_location[location]
             if temp['type'] == 'minimum':
-                by_location[location]['mins'].append(temp['value'])
+                data['min'] = min(data['min'], temp['value'])
+                data['min_count'] += 1
             elif temp['type'] == 'maximum':
-                by_location[location]['maxs'].append(temp['value'])
+                data['max'] = max(data['max'], temp['value'])
+                data['max_count'] += 1
         
         # Create summary
         summary = {
-            'date': datetime.now().date(),
+            'date': temperatures[0]['timestamp'].date(),  # Same clock reading as the temperatures
             'source': filename,
             'locations': []
         }
         
         for location, data in by_location.items():
-            if data['mins'] and data['maxs']:
+            if data['min_count'] and data['max_count']:
                 location_summary = {
                     'location': location,
-                    'min_temp': min(data['mins']),
-                    'max_temp': max(data['maxs']),
-                    'readings_count': len(data['mins'])
+                    'min_temp': data['min'],
+                    'max_temp': data['max'],
+                    'readings_count': data['min_count']
                 }
                 summary['locations'].append(location_summary)
         
@@ -425,12 +614,16 @@ class PDFTemperatureParser:
             (is_valid, message)
         """
         try:
-            text_content = self._extract_text_from_pdf(pdf_data)
+            has_location_details = has_recordings = has_temp_data = False
             
-            # Check for key indicators
-            has_location_details = 'Location Details' in text_content
-            has_recordings = 'Recordings' in text_content
-            has_temp_data = re.search(r'\d+\.?\d*\s*°C', text_content) is not None
+            # Check for key indicators page by page - a valid report shows them all on its first pages
+            for page_text in self._iter_page_texts(pdf_data):
+                has_location_details = has_location_details or 'Location Details' in page_text
+                has_recordings = has_recordings or 'Recordings' in page_text
+                has_temp_data = has_temp_data or ANY_TEMP_RE.search(page_text) is not None
+                
+                if has_location_details and has_recordings and has_temp_data:
+                    break
             
             if has_location_details and has_recordings and has_temp_data:
                 return True, "Valid Clever Logger format detected"
@@ -463,11 +656,11 @@ def parse_pdf_file(file_path: str) -> Dict:
     parser = PDFTemperatureParser()
     
     try:
-        with open(file_path, 'rb') as file:
-            pdf_data = file.read()
+        filename = os.path.basename(file_path)
         
-        filename = file_path.split('/')[-1]  # Get filename from path
-        return parser.parse_pdf_data(pdf_data, filename)
+        # Let the PDF library open the file itself rather than reading it into memory -
+        # a new parser has nothing cached, so the content is not hashed either
+        return parser._parse_pdf(file_path, filename)
         
     except Exception as e:
         logger.error(f"Error reading PDF file '{file_path}': {e}")
@@ -3,15 +3,144 @@ Google Sheets Service for Temperature Monitor
 Handles temperature logging with separate tabs per location
 """
 
+import re
+import math
+import time
+import heapq
+import random
 import logging
+import threading
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
+from functools import lru_cache
 from googleapiclient.errors import HttpError
 
 logger = logging.getLogger(__name__)
 
+# Rate limit and transient server errors that are worth retrying
+RETRYABLE_STATUS_CODES = (429, 500, 503)
+# A 500/503 may come back after a write was applied, so calls that add rows only retry rate limits
+NON_IDEMPOTENT_RETRYABLE_STATUS_CODES = (429,)
+
+# Sheets allows 60 write requests per minute per user - stay a little below that
+SHEETS_WRITES_PER_MINUTE = 50
+
+# One row of a location sheet, in header order, plus the location (tab) it came from
+TemperatureEntry = namedtuple(
+    'TemperatureEntry',
+    'date day_of_week min_temp max_temp logged_time staff_name location'
+)
+
+@lru_cache(maxsize=1024)
+def entry_date_key(date_str):
+    """
+    Sort key for a Date cell. ISO dates sort as real dates; anything else (e.g. a date
+    typed by hand as 7/2/2025) sorts after them as text instead of being mixed in.
+    Cached because every location sheet holds the same run of dates.
+    """
+    try:
+        return (1, date.fromisoformat(date_str))
+    except (TypeError, ValueError):
+        return (0, str(date_str))
+
+def _entry_sort_key(entry):
+    return entry_date_key(entry.date)
+
+# Location name keywords used to pick smart defaults for newly discovered locations
+FRIDGE_KEYWORDS_RE = re.compile('fridge|freezer|vaccine|insulin|cold')
+ROOM_KEYWORDS_RE = re.compile('room|dispensary|storage|office|counter')
+
+class TokenBucket:
+    """Thread-safe token bucket that spaces out requests to stay under a per-minute quota"""
+    
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Take one token, sleeping until it is available"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            # Reserve the token now so concurrent callers queue up behind each other
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        
+        if wait:
+            logger.info("Sheets write budget used up, waiting %.1fs", wait)
+            time.sleep(wait)
+
+# Shared by every write in the process since the quota is per user, not per service instance
+sheets_write_budget = TokenBucket(SHEETS_WRITES_PER_MINUTE)
+
+def execute_with_retry(request, max_tries=5, base_delay=1.0, max_delay=30.0, idempotent=True):
+    """
+    Execute a Google API request, retrying rate limits and transient server errors
+    with exponential backoff and jitter. A Retry-After header is honoured when present.
+    Non-retryable errors are raised immediately. Write requests draw from the shared
+    write budget so bursts are spread out before the server has to reject them.
+    Pass idempotent=False for requests that add data, so they are only retried on 429.
+    """
+    is_write = getattr(request, 'method', 'GET') != 'GET'
+    retryable = RETRYABLE_STATUS_CODES if idempotent else NON_IDEMPOTENT_RETRYABLE_STATUS_CODES
+    
+    for attempt in range(1, max_tries + 1):
+        try:
+            if is_write:
+                sheets_write_budget.acquire()
+            return request.execute()
+        except HttpError as e:
+            status = getattr(e.resp, 'status', None)
+            try:
+                status = int(status)
+            except (TypeError, ValueError):
+                pass
+            
+            if status not in retryable or attempt == max_tries:
+                raise
+            
+            delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+            try:
+                retry_after = float(e.resp.get('retry-after'))
+                delay = min(max_delay, retry_after)
+            except (AttributeError, TypeError, ValueError):
+                pass
+            delay += random.uniform(0, delay / 2)
+            
+            logger.warning("Sheets API returned %s, retrying in %.1fs (attempt %d/%d)", status, delay, attempt, max_tries)
+            time.sleep(delay)
+
 class TemperatureSheetsService:
     """Service for logging temperature data to Google Sheets with separate tabs per location"""
     
+    # How long the tab title -> sheetId map is trusted before it is fetched again
+    SHEET_METADATA_TTL = 3600
+    # How long a successfully validated spreadsheet is trusted before it is checked again
+    VALIDATION_TTL = 900
+    
+    # Location name row (row 1) - large, bold, colored
+    TITLE_FORMAT = {
+        'backgroundColor': {'red': 0.1, 'green': 0.4, 'blue': 0.8},
+        'textFormat': {
+            'foregroundColor': {'red': 1.0, 'green': 1.0, 'blue': 1.0},
+            'bold': True,
+            'fontSize': 16
+        }
+    }
+    
+    # Header row (row 3) - bold, light blue
+    HEADER_FORMAT = {
+        'backgroundColor': {'red': 0.8, 'green': 0.9, 'blue': 1.0},
+        'textFormat': {
+            'bold': True
+        }
+    }
+    
     def __init__(self, auth_manager, spreadsheet_id=None, config_manager=None):
         """Initialize with authenticated Sheets service"""
         self.auth_manager = auth_manager
@@ -19,6 +148,20 @@ class TemperatureSheetsService:
         self.sheets_service = None
         self.spreadsheet_id = spreadsheet_id
         
+        # Cached sheet metadata: {tab title: sheetId} for _sheet_ids_spreadsheet
+        self._sheet_ids = None
+        self._sheet_ids_spreadsheet = None
+        self._sheet_ids_fetched_at = 0.0
+        # The scheduler thread and web requests share the cache - only one of them fetches it
+        self._sheet_ids_lock = threading.RLock()
+        
+        # Spreadsheet validated by ensure_spreadsheet_exists and when that check expires
+        self._validated_spreadsheet = None
+        self._validated_until = 0.0
+        
+        # Row of each location's entry for a given day: {(spreadsheet_id, location): (date_str, row)}
+        self._entry_rows = {}
+        
         # Simplified headers for each location sheet
         self.headers = [
             "Date",
@@ -28,6 +171,16 @@ class TemperatureSheetsService:
             "Logged Time",
             "Staff Name"
         ]
+        
+        # Parts of the location sheet body that are the same for every location, built once
+        # and shared by reference - request bodies are only read when they are serialized
+        self._title_padding_cells = [{'userEnteredFormat': self.TITLE_FORMAT}] * (len(self.headers) - 1)
+        self._header_row_data = {'values': [
+            {'userEnteredValue': {'stringValue': header}, 'userEnteredFormat': self.HEADER_FORMAT}
+            for header in self.headers
+        ]}
+        # create() cannot auto-resize, so give every column a width that fits the headers
+        self._column_metadata = [{'pixelSize': 120}] * len(self.headers)
     
     def connect(self):
         """Connect to Google Sheets service"""
@@ -46,6 +199,29 @@ class TemperatureSheetsService:
             logger.error(error_msg)
             return False, error_msg
     
+    def warmup(self):
+        """Connect and make a minimal request so the first real write reuses an open connection"""
+        try:
+            if not self.sheets_service:
+                success, message = self.connect()
+                if not success:
+                    return False, message
+            
+            if not self.spreadsheet_id:
+                return True, "Sheets client ready"
+            
+            execute_with_retry(self.sheets_service.spreadsheets().get(
+                spreadsheetId=self.spreadsheet_id,
+                fields='spreadsheetId'
+            ))
+            
+            logger.info("Google Sheets connection warmed up")
+            return True, "Sheets connection warmed up"
+            
+        except Exception as e:
+            logger.warning(f"Sheets warmup failed: {e}")
+            return False, f"Sheets warmup failed: {e}"
+    
     def validate_existing_spreadsheet(self):
         """Check if the current spreadsheet_id is valid and accessible"""
         try:
@@ -60,35 +236,51 @@ class TemperatureSheetsService:
             
             # Try to access the spreadsheet metadata
             logger.info(f"Validating existing spreadsheet: {self.spreadsheet_id}")
-            spreadsheet = self.sheets_service.spreadsheets().get(
-                spreadsheetId=self.spreadsheet_id
-            ).execute()
+            spreadsheet = self._fetch_spreadsheet_metadata(self.sheets_service, self.spreadsheet_id)
             
             title = spreadsheet.get('properties', {}).get('title', 'Unknown')
             sheet_count = len(spreadsheet.get('sheets', []))
+            self._cache_sheet_ids(spreadsheet)
             
             logger.info(f"✅ Found existing spreadsheet: '{title}' with {sheet_count} sheets")
             return True, f"Valid spreadsheet: {title}"
             
         except Exception as e:
-            error_msg = str(e).lower()
-            if 'not found' in error_msg or 'does not exist' in error_msg:
-                logger.warning(f"Spreadsheet {self.spreadsheet_id} not found or deleted")
-                return False, "Spreadsheet not found - may have been deleted"
-            elif 'permission' in error_msg or 'access' in error_msg:
-                logger.warning(f"No access to spreadsheet {self.spreadsheet_id}")
-                return False, "No permission to access spreadsheet"
-            else:
-                logger.error(f"Error validating spreadsheet {self.spreadsheet_id}: {e}")
-                return False, f"Validation error: {e}"
+            return self._validation_failure(self.spreadsheet_id, e)
+    
+    def _fetch_spreadsheet_metadata(self, service, spreadsheet_id):
+        """Fetch the title and tab properties of a spreadsheet"""
+        return execute_with_retry(service.spreadsheets().get(
+            spreadsheetId=spreadsheet_id,
+            fields='properties.title,sheets.properties(sheetId,title)'
+        ))
+    
+    def _validation_failure(self, spreadsheet_id, error):
+        """Turn a spreadsheet validation error into a (False, message) result"""
+        error_msg = str(error).lower()
+        if 'not found' in error_msg or 'does not exist' in error_msg:
+            logger.warning(f"Spreadsheet {spreadsheet_id} not found or deleted")
+            return False, "Spreadsheet not found - may have been deleted"
+        elif 'permission' in error_msg or 'access' in error_msg:
+            logger.warning(f"No access to spreadsheet {spreadsheet_id}")
+            return False, "No permission to access spreadsheet"
+        else:
+            logger.error(f"Error validating spreadsheet {spreadsheet_id}: {error}")
+            return False, f"Validation error: {error}"
 
     def ensure_spreadsheet_exists(self, auto_discover_locations=True):
         """Ensure we have a valid spreadsheet - use existing or create new"""
         try:
+            # Skip the metadata request if this spreadsheet was validated recently
+            if (self.spreadsheet_id and self._validated_spreadsheet == self.spreadsheet_id and
+                    time.monotonic() < self._validated_until):
+                return True, f"Using existing spreadsheet: {self.spreadsheet_id}"
+            
             # First, try to validate existing spreadsheet
             if self.spreadsheet_id:
                 valid, validation_message = self.validate_existing_spreadsheet()
                 if valid:
+                    self._mark_validated()
                     logger.info(f"Using existing spreadsheet: {validation_message}")
                     return True, f"Using existing spreadsheet: {validation_message}"
                 else:
@@ -125,6 +317,7 @@ class TemperatureSheetsService:
             )
             
             if spreadsheet:
+                self._mark_validated()
                 logger.info(f"✅ New spreadsheet created: {self.spreadsheet_id}")
                 return True, f"Created new spreadsheet with {len(locations)} locations"
             else:
@@ -135,8 +328,31 @@ class TemperatureSheetsService:
             logger.error(error_msg)
             return False, error_msg
 
+    def _mark_validated(self):
+        """Trust the current spreadsheet for VALIDATION_TTL seconds"""
+        self._validated_spreadsheet = self.spreadsheet_id
+        self._validated_until = time.monotonic() + self.VALIDATION_TTL
+    
+    def _check_spreadsheet_error(self, error):
+        """Forget the validation if an API error says the spreadsheet is gone or no longer accessible"""
+        if isinstance(error, HttpError) and str(getattr(error.resp, 'status', '')) in ('403', '404'):
+            logger.warning(f"Spreadsheet {self.spreadsheet_id} returned {error.resp.status} - will validate again")
+            self._validated_until = 0.0
+            self.invalidate_sheet_metadata()
+    
     def discover_and_configure_locations(self, temperature_readings):
         """Discover new locations from readings and create configs with smart defaults"""
+        # Extract unique locations from readings
+        discovered_locations = set()
+        for reading in temperature_readings:
+            location = reading.get('location', '').strip()
+            if location:
+                discovered_locations.add(location)
+        
+        self.discover_and_configure_location_names(discovered_locations)
+    
+    def discover_and_configure_location_names(self, location_names):
+        """Create configs with smart defaults for any location names not configured yet"""
         try:
             if not hasattr(self, 'config_manager') or not self.config_manager:
                 return
@@ -148,15 +364,10 @@ class TemperatureSheetsService:
             })
             location_configs = temp_config.get('locations', {})
             
-            # Track if we need to save config
-            config_updated = False
+            # Track how many locations we add (config needs saving if any)
+            new_location_count = 0
             
-            # Extract unique locations from readings
-            discovered_locations = set()
-            for reading in temperature_readings:
-                location = reading.get('location', '').strip()
-                if location:
-                    discovered_locations.add(location)
+            discovered_locations = {location.strip() for location in location_names if location and location.strip()}
             
             # Create configs for new locations with smart defaults
             for location in discovered_locations:
@@ -164,7 +375,7 @@ class TemperatureSheetsService:
                     # Smart default assignment based on location name
                     location_lower = location.lower()
                     
-                    if any(keyword in location_lower for keyword in ['fridge', 'freezer', 'vaccine', 'insulin', 'cold']):
+                    if FRIDGE_KEYWORDS_RE.search(location_lower):
                         # Looks like a fridge/cold storage
                         new_config = {
                             'type': 'fridge',
@@ -172,7 +383,7 @@ class TemperatureSheetsService:
                             'max_temp': 8.0,
                             'name': f'{location} (Fridge Monitor)'
                         }
-                    elif any(keyword in location_lower for keyword in ['room', 'dispensary', 'storage', 'office', 'counter']):
+                    elif ROOM_KEYWORDS_RE.search(location_lower):
                         # Looks like room temperature
                         new_config = {
                             'type': 'room', 
@@ -187,18 +398,18 @@ class TemperatureSheetsService:
                     
                     # Add to config
                     location_configs[location] = new_config
-                    config_updated = True
+                    new_location_count += 1
                     
                     logger.info(f"🔍 Auto-configured new location '{location}' as {new_config['type']} ({new_config['min_temp']}-{new_config['max_temp']}°C)")
             
             # Save updated config if we added any locations
-            if config_updated:
+            if new_location_count:
                 if 'temperature' not in self.config_manager.config:
                     self.config_manager.config['temperature'] = {}
                 self.config_manager.config['temperature']['locations'] = location_configs
                 self.config_manager.save_config()
                 
-                logger.info(f"✅ Updated config with {len([l for l in discovered_locations if l not in temp_config.get('locations', {})])} new locations")
+                logger.info(f"✅ Updated config with {new_location_count} new locations")
         
         except Exception as e:
             logger.error(f"Error discovering and configuring locations: {e}")
@@ -211,22 +422,10 @@ class TemperatureSheetsService:
                 if not success:
                     return None, message
             
-            # Create sheets for each location
-            sheets = []
-            for i, location in enumerate(locations):
-                sheet_config = {
-                    'properties': {
-                        'title': location,
-                        'sheetId': i,
-                        'gridProperties': {
-                            'rowCount': 1000,
-                            'columnCount': len(self.headers)
-                        }
-                    }
-                }
-                sheets.append(sheet_config)
+            # Create sheets for each location, already holding their title, headers and formatting
+            sheets = [self._location_sheet_config(i, location) for i, location in enumerate(locations)]
             
-            # Create new spreadsheet with multiple sheets
+            # Create new spreadsheet with multiple sheets - a single request provisions everything
             spreadsheet_body = {
                 'properties': {
                     'title': title
@@ -234,9 +433,10 @@ class TemperatureSheetsService:
                 'sheets': sheets
             }
             
-            spreadsheet = self.sheets_service.spreadsheets().create(
-                body=spreadsheet_body
-            ).execute()
+            spreadsheet = execute_with_retry(self.sheets_service.spreadsheets().create(
+                body=spreadsheet_body,
+                fields='spreadsheetId,properties.title,sheets.properties(sheetId,title)'
+            ), idempotent=False)
             
             self.spreadsheet_id = spreadsheet['spreadsheetId']
             logger.info(f"DEBUG: config_manager exists: {self.config_manager is not None}")
@@ -253,9 +453,7 @@ class TemperatureSheetsService:
                 self.config_manager.save_config()
                 logger.info(f"Saved spreadsheet ID to config: {self.spreadsheet_id}")
 
-            # Setup each location sheet
-            for location in locations:
-                self.setup_location_sheet(location)
+            self._cache_sheet_ids(spreadsheet)
             
             logger.info(f"Created temperature spreadsheet with {len(locations)} location tabs: {self.spreadsheet_id}")
             return spreadsheet, f"Created spreadsheet: {title} with {len(locations)} location tabs"
@@ -269,141 +467,97 @@ class TemperatureSheetsService:
             logger.error(error_msg)
             return None, error_msg
     
-    def setup_location_sheet(self, location_name):
-        """Setup a single location sheet with location name at top and headers"""
-        try:
-            # Row 1: Location name (large, bold)
-            location_range = f"{location_name}!A1:F1"
-            self.sheets_service.spreadsheets().values().update(
-                spreadsheetId=self.spreadsheet_id,
-                range=location_range,
-                valueInputOption='RAW',
-                body={'values': [[location_name, "", "", "", "", ""]]}
-            ).execute()
-            
-            # Row 3: Headers (skip row 2 for spacing)
-            header_range = f"{location_name}!A3:F3"
-            self.sheets_service.spreadsheets().values().update(
+    def _cache_sheet_ids(self, spreadsheet):
+        """Remember the tab title -> sheetId map from a spreadsheet resource"""
+        sheet_ids = {
+            sheet['properties']['title']: sheet['properties']['sheetId']
+            for sheet in spreadsheet.get('sheets', [])
+        }
+        with self._sheet_ids_lock:
+            self._sheet_ids = sheet_ids
+            self._sheet_ids_spreadsheet = self.spreadsheet_id
+            self._sheet_ids_fetched_at = time.monotonic()
+        return sheet_ids
+    
+    def _get_sheet_ids(self, refresh=False):
+        """Get the tab title -> sheetId map, fetching it only when missing, stale or refresh is requested"""
+        with self._sheet_ids_lock:
+            if (not refresh and self._sheet_ids is not None and
+                    self._sheet_ids_spreadsheet == self.spreadsheet_id and
+                    time.monotonic() - self._sheet_ids_fetched_at < self.SHEET_METADATA_TTL):
+                return self._sheet_ids
+            
+            spreadsheet = execute_with_retry(self.sheets_service.spreadsheets().get(
                 spreadsheetId=self.spreadsheet_id,
-                range=header_range,
-                valueInputOption='RAW',
-                body={'values': [self.headers]}
-            ).execute()
-            
-            # Apply formatting
-            self.format_location_sheet(location_name)
-            
-            logger.info(f"Setup sheet for location: {location_name}")
-            
-        except Exception as e:
-            logger.error(f"Error setting up sheet for {location_name}: {e}")
+                fields='sheets.properties(sheetId,title)'
+            ))
+            return self._cache_sheet_ids(spreadsheet)
     
-    def format_location_sheet(self, location_name):
-        """Apply formatting to a location sheet"""
-        try:
-            # Get sheet ID for this location
-            sheet_metadata = self.sheets_service.spreadsheets().get(
-                spreadsheetId=self.spreadsheet_id
-            ).execute()
-            
-            sheet_id = None
-            for sheet in sheet_metadata['sheets']:
-                if sheet['properties']['title'] == location_name:
-                    sheet_id = sheet['properties']['sheetId']
-                    break
-            
-            if sheet_id is None:
-                logger.error(f"Could not find sheet ID for {location_name}")
-                return
-            
-            requests = [
-                # Freeze header rows (location name + headers)
-                {
-                    'updateSheetProperties': {
-                        'properties': {
-                            'sheetId': sheet_id,
-                            'gridProperties': {
-                                'frozenRowCount': 3
-                            }
-                        },
-                        'fields': 'gridProperties.frozenRowCount'
-                    }
-                },
-                # Format location name row (row 1) - large, bold, colored
-                {
-                    'repeatCell': {
-                        'range': {
-                            'sheetId': sheet_id,
-                            'startRowIndex': 0,
-                            'endRowIndex': 1
-                        },
-                        'cell': {
-                            'userEnteredFormat': {
-                                'backgroundColor': {'red': 0.1, 'green': 0.4, 'blue': 0.8},
-                                'textFormat': {
-                                    'foregroundColor': {'red': 1.0, 'green': 1.0, 'blue': 1.0},
-                                    'bold': True,
-                                    'fontSize': 16
-                                }
-                            }
-                        },
-                        'fields': 'userEnteredFormat(backgroundColor,textFormat)'
-                    }
-                },
-                # Format header row (row 3) - bold, light blue
-                {
-                    'repeatCell': {
-                        'range': {
-                            'sheetId': sheet_id,
-                            'startRowIndex': 2,
-                            'endRowIndex': 3
-                        },
-                        'cell': {
-                            'userEnteredFormat': {
-                                'backgroundColor': {'red': 0.8, 'green': 0.9, 'blue': 1.0},
-                                'textFormat': {
-                                    'bold': True
-                                }
-                            }
-                        },
-                        'fields': 'userEnteredFormat(backgroundColor,textFormat)'
-                    }
-                },
-                # Auto-resize columns
-                {
-                    'autoResizeDimensions': {
-                        'dimensions': {
-                            'sheetId': sheet_id,
-                            'dimension': 'COLUMNS',
-                            'startIndex': 0,
-                            'endIndex': len(self.headers)
-                        }
-                    }
-                },
-                # Merge cells for location name
-                {
-                    'mergeCells': {
-                        'range': {
-                            'sheetId': sheet_id,
-                            'startRowIndex': 0,
-                            'endRowIndex': 1,
-                            'startColumnIndex': 0,
-                            'endColumnIndex': len(self.headers)
-                        },
-                        'mergeType': 'MERGE_ALL'
-                    }
+    def invalidate_sheet_metadata(self):
+        """Forget the cached tab list, e.g. after tabs were added or renamed outside this service"""
+        with self._sheet_ids_lock:
+            self._sheet_ids = None
+    
+    def _get_sheet_id(self, title):
+        """Get the sheetId of a tab, refreshing the cached metadata once if the tab is unknown"""
+        sheet_id = self._get_sheet_ids().get(title)
+        if sheet_id is None:
+            sheet_id = self._get_sheet_ids(refresh=True).get(title)
+        return sheet_id
+    
+    @staticmethod
+    def _a1_range(location, cells):
+        """A1 range on a location tab, quoting the tab name so spaces and apostrophes are safe"""
+        return "'" + location.replace("'", "''") + "'!" + cells
+    
+    @staticmethod
+    def _update_cells_request(sheet_id, row_number, column_index, values):
+        """updateCells request writing string values into one row, addressed by sheetId and index"""
+        return {
+            'updateCells': {
+                'rows': [{'values': [{'userEnteredValue': {'stringValue': value}} for value in values]}],
+                'fields': 'userEnteredValue',
+                'start': {'sheetId': sheet_id, 'rowIndex': row_number - 1, 'columnIndex': column_index}
+            }
+        }
+    
+    def _location_sheet_config(self, sheet_id, location_name):
+        """Build the create() body for a location sheet: location name at top, headers and formatting"""
+        header_count = len(self.headers)
+        
+        # Location name row (row 1) - only the first cell differs between locations
+        title_cells = [{'userEnteredValue': {'stringValue': location_name}, 'userEnteredFormat': self.TITLE_FORMAT}]
+        title_cells += self._title_padding_cells
+        
+        return {
+            'properties': {
+                'title': location_name,
+                'sheetId': sheet_id,
+                'gridProperties': {
+                    'rowCount': 1000,
+                    'columnCount': header_count,
+                    'frozenRowCount': 3  # Freeze header rows (location name + headers)
                 }
-            ]
-            
-            self.sheets_service.spreadsheets().batchUpdate(
-                spreadsheetId=self.spreadsheet_id,
-                body={'requests': requests}
-            ).execute()
-            
-            logger.info(f"Applied formatting to {location_name} sheet")
-            
-        except Exception as e:
-            logger.error(f"Error formatting sheet for {location_name}: {e}")
+            },
+            'data': [{
+                'startRow': 0,
+                'startColumn': 0,
+                'rowData': [
+                    {'values': title_cells},
+                    {},  # Row 2 left empty for spacing
+                    self._header_row_data
+                ],
+                'columnMetadata': self._column_metadata
+            }],
+            # Merge cells for location name
+            'merges': [{
+                'sheetId': sheet_id,
+                'startRowIndex': 0,
+                'endRowIndex': 1,
+                'startColumnIndex': 0,
+                'endColumnIndex': header_count
+            }]
+        }
     
     def log_temperature_readings(self, temperature_readings, staff_name=None, custom_logged_time=None):
         """Log temperature readings from Gmail parsing to appropriate location sheets"""
@@ -421,36 +575,35 @@ class TemperatureSheetsService:
             logger.info(f"Using spreadsheet for logging: {self.spreadsheet_id}")
 
             self.discover_and_configure_locations(temperature_readings)
+            # One clock reading for the whole batch - every location is logged for the same day
+            now = datetime.now()
+            
             # Use custom logged time if provided, otherwise current time
             if custom_logged_time:
                 logged_time = custom_logged_time.strftime("%H:%M")
             else:
-                logged_time = datetime.now().strftime("%H:%M")
-            
-            results = []
+                logged_time = now.strftime("%H:%M")
             
-            # Group readings by location
-            readings_by_location = {}
+            # Fold readings into [lowest minimum, highest maximum] per location in one pass
+            readings_by_location = defaultdict(lambda: [math.inf, -math.inf])
             for reading in temperature_readings:
-                location = reading['location']
-                if location not in readings_by_location:
-                    readings_by_location[location] = {'mins': [], 'maxs': []}
-                
+                temps = readings_by_location[reading['location']]
+                value = reading['value']
                 if reading['type'] == 'minimum':
-                    readings_by_location[location]['mins'].append(reading['value'])
+                    if value < temps[0]:
+                        temps[0] = value
                 elif reading['type'] == 'maximum':
-                    readings_by_location[location]['maxs'].append(reading['value'])
-            
-            # Log data for each location
-            for location, temps in readings_by_location.items():
-                if temps['mins'] and temps['maxs']:
-                    min_temp = min(temps['mins'])
-                    max_temp = max(temps['maxs'])
-                    
-                    success, message = self.log_location_temperature(
-                        location, min_temp, max_temp, logged_time, staff_name
-                    )
-                    results.append((location, success, message))
+                    if value > temps[1]:
+                        temps[1] = value
+            
+            # Log data for every location with one batched read and batched writes,
+            # skipping locations that are missing either a minimum or a maximum
+            location_temps = [
+                (location, min_temp, max_temp)
+                for location, (min_temp, max_temp) in readings_by_location.items()
+                if min_temp != math.inf and max_temp != -math.inf
+            ]
+            results = self.log_location_temperatures(location_temps, logged_time, staff_name, now=now)
             
             # Summarize results
             successful = [r for r in results if r[1]]
@@ -474,59 +627,152 @@ class TemperatureSheetsService:
             logger.error(error_msg)
             return False, error_msg
     
-    def log_location_temperature(self, location, min_temp, max_temp, logged_time, staff_name=None):
-        """Log temperature data for a specific location"""
+    def log_location_temperatures(self, location_temps, logged_time, staff_name=None, now=None):
+        """
+        Log today's min/max for several locations using one batchGet and one batched write
+        
+        Args:
+            location_temps: list of (location, min_temp, max_temp) tuples
+            logged_time: "HH:MM" string for the Logged Time column
+            staff_name: Staff name for new entries (existing names are preserved)
+            now: Timestamp giving the entry date (defaults to the current time)
+            
+        Returns:
+            List of (location, success, message) in the same order as location_temps
+        """
+        results = [None] * len(location_temps)
+        
         try:
-            today = datetime.now()
+            if not location_temps:
+                return results
+            
+            today = now or datetime.now()
             day_of_week = today.strftime("%A")
             date_str = today.strftime("%Y-%m-%d")
             
-            # Prepare the data row
-            row_data = [
-                date_str,           # Date
-                day_of_week,        # Day of Week
-                f"{min_temp:.1f}",  # Min Temperature
-                f"{max_temp:.1f}",  # Max Temperature
-                logged_time,        # Logged Time
-                staff_name or ""    # Staff Name (blank if not provided)
-            ]
+            # Locations without a tab cannot be logged - everything else goes in the batch
+            sheet_ids = self._get_sheet_ids()
+            if any(location not in sheet_ids for location, _, _ in location_temps):
+                # A tab may have been added since the metadata was cached
+                sheet_ids = self._get_sheet_ids(refresh=True)
             
-            # Check if entry for today already exists
-            existing_row = self.find_todays_entry(location)
+            pending = []
+            for index, (location, min_temp, max_temp) in enumerate(location_temps):
+                if location in sheet_ids:
+                    pending.append((index, location, min_temp, max_temp))
+                else:
+                    results[index] = (location, False, f"No sheet found for {location}")
             
-            if existing_row:
-                # Update existing entry (preserve staff name if already filled)
-                success, message = self.update_location_entry(location, existing_row, row_data, preserve_staff=True)
-            else:
-                # Add new entry
-                success, message = self.add_location_entry(location, row_data)
+            if not pending:
+                return results
             
-            if success:
-                logger.info(f"Temperature logged for {location}: {date_str} - Min {min_temp:.1f}°C, Max {max_temp:.1f}°C")
+            # Read every pending sheet's entries at once (starting from row 4, since rows 1-3 are headers)
+            response = execute_with_retry(self.sheets_service.spreadsheets().values().batchGet(
+                spreadsheetId=self.spreadsheet_id,
+                ranges=[self._a1_range(location, "A4:F") for _, location, _, _ in pending],
+                fields='valueRanges.values'
+            ))
+            value_ranges = response.get('valueRanges', [])
+            
+            # Updates and appends go out together in one batchUpdate, addressed by sheetId
+            requests = []
+            logged = []
+            
+            for (index, location, min_temp, max_temp), value_range in zip(pending, value_ranges):
+                # Prepare the data row
+                row_data = [
+                    date_str,           # Date
+                    day_of_week,        # Day of Week
+                    f"{min_temp:.1f}",  # Min Temperature
+                    f"{max_temp:.1f}",  # Max Temperature
+                    logged_time,        # Logged Time
+                    staff_name or ""    # Staff Name (blank if not provided)
+                ]
+                
+                # Check if entry for today already exists
+                rows = value_range.get('values', [])
+                existing_row = None
+                for row_number, row in enumerate(rows, start=4):
+                    if row and row[0] == date_str:
+                        existing_row = row_number
+                        # Preserve existing staff name if it's already filled
+                        if len(row) > 5 and row[5].strip():
+                            row_data[5] = row[5]
+                        break
+                
+                if existing_row:
+                    requests.append(self._update_cells_request(sheet_ids[location], existing_row, 0, row_data))
+                    message = f"Updated existing entry for {location} on {date_str}"
+                else:
+                    requests.append({
+                        'appendCells': {
+                            'sheetId': sheet_ids[location],
+                            'rows': [{'values': [{'userEnteredValue': {'stringValue': value}} for value in row_data]}],
+                            'fields': 'userEnteredValue'
+                        }
+                    })
+                    message = f"Added new entry for {location} on {date_str}"
+                
+                # appendCells writes just after the last row with data
+                entry_row = existing_row or 4 + len(rows)
+                logged.append((index, location, min_temp, max_temp, entry_row, message))
+            
+            if requests:
+                execute_with_retry(self.sheets_service.spreadsheets().batchUpdate(
+                    spreadsheetId=self.spreadsheet_id,
+                    body={'requests': requests},
+                    fields='spreadsheetId'  # Replies are not used
+                ), idempotent=False)  # May contain appendCells
             
-            return success, message
+            for index, location, min_temp, max_temp, entry_row, message in logged:
+                self._remember_entry_row(location, date_str, entry_row)
+                logger.info(f"Temperature logged for {location}: {date_str} - Min {min_temp:.1f}°C, Max {max_temp:.1f}°C")
+                results[index] = (location, True, message)
             
         except Exception as e:
-            error_msg = f"Error logging temperature for {location}: {e}"
-            logger.error(error_msg)
-            return False, error_msg
+            logger.error(f"Error logging location temperatures: {e}")
+            self._check_spreadsheet_error(e)
+            for index, (location, _, _) in enumerate(location_temps):
+                if results[index] is None:
+                    results[index] = (location, False, f"Error logging temperature for {location}: {e}")
+        
+        return results
+    
+    def log_location_temperature(self, location, min_temp, max_temp, logged_time, staff_name=None):
+        """Log temperature data for a specific location"""
+        # The batched path reads today's row and staff name together, so no separate staff lookup is needed
+        _, success, message = self.log_location_temperatures(
+            [(location, min_temp, max_temp)], logged_time, staff_name
+        )[0]
+        return success, message
+    
+    def _remember_entry_row(self, location, date_str, row_number):
+        """Remember which row holds a location's entry for a date"""
+        self._entry_rows[(self.spreadsheet_id, location)] = (date_str, row_number)
     
     def find_todays_entry(self, location):
         """Find if there's already an entry for today in the specified location sheet"""
         try:
             today_str = datetime.now().strftime("%Y-%m-%d")
             
+            # Rows are only ever added below today's entry, so a row found earlier today is still valid
+            cached = self._entry_rows.get((self.spreadsheet_id, location))
+            if cached and cached[0] == today_str:
+                return cached[1]
+            
             # Get date column from the location sheet (starting from row 4, since rows 1-3 are headers)
-            result = self.sheets_service.spreadsheets().values().get(
+            result = execute_with_retry(self.sheets_service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
-                range=f"{location}!A4:A"  # Start from row 4 (after headers)
-            ).execute()
+                range=self._a1_range(location, "A4:A"),  # Start from row 4 (after headers)
+                fields='values'
+            ))
             
             values = result.get('values', [])
             
             # Look for today's date
             for i, row in enumerate(values, start=4):  # Start from row 4
                 if row and row[0] == today_str:
+                    self._remember_entry_row(location, today_str, i)
                     return i  # Return row number (1-indexed)
             
             return None
@@ -535,30 +781,77 @@ class TemperatureSheetsService:
             logger.error(f"Error finding today's entry for {location}: {e}")
             return None
     
-    def update_location_entry(self, location, row_number, row_data, preserve_staff=False):
-        """Update an existing temperature entry for a location"""
+    def find_todays_entry_with_row(self, location):
+        """Find today's entry in a location sheet, returning (row number, row values) or (None, None)"""
+        try:
+            today_str = datetime.now().strftime("%Y-%m-%d")
+            
+            # A row found earlier today only needs that one row read back
+            cached = self._entry_rows.get((self.spreadsheet_id, location))
+            if cached and cached[0] == today_str:
+                row_number = cached[1]
+                result = execute_with_retry(self.sheets_service.spreadsheets().values().get(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=self._a1_range(location, f"A{row_number}:F{row_number}"),
+                    fields='values'
+                ))
+                values = result.get('values', [])
+                if values and values[0] and values[0][0] == today_str:
+                    return row_number, values[0]
+            
+            # Get every entry from the location sheet (starting from row 4, since rows 1-3 are headers)
+            result = execute_with_retry(self.sheets_service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range=self._a1_range(location, "A4:F"),  # Start from row 4 (after headers)
+                fields='values'
+            ))
+            
+            # Look for today's date
+            for i, row in enumerate(result.get('values', []), start=4):  # Start from row 4
+                if row and row[0] == today_str:
+                    self._remember_entry_row(location, today_str, i)
+                    return i, row
+            
+            return None, None
+            
+        except Exception as e:
+            logger.error(f"Error finding today's entry for {location}: {e}")
+            return None, None
+    
+    def update_location_entry(self, location, row_number, row_data, preserve_staff=False, existing_staff=None):
+        """
+        Update an existing temperature entry for a location
+        
+        When preserve_staff is set, pass the row's current staff name as existing_staff if it is
+        already known - otherwise it is read from the sheet first.
+        """
         try:
-            if preserve_staff:
+            if preserve_staff and existing_staff is not None:
+                if existing_staff.strip():
+                    row_data[5] = existing_staff
+            elif preserve_staff:
                 # Get existing staff name to preserve it if already filled
-                result = self.sheets_service.spreadsheets().values().get(
+                result = execute_with_retry(self.sheets_service.spreadsheets().values().get(
                     spreadsheetId=self.spreadsheet_id,
-                    range=f"{location}!F{row_number}:F{row_number}"  # Staff Name column
-                ).execute()
+                    range=self._a1_range(location, f"F{row_number}:F{row_number}"),  # Staff Name column
+                    fields='values'
+                ))
                 
                 existing_staff = result.get('values', [])
                 if existing_staff and existing_staff[0] and existing_staff[0][0].strip():
                     # Preserve existing staff name if it's already filled
                     row_data[5] = existing_staff[0][0]
             
-            # Update the row
-            range_name = f"{location}!A{row_number}:F{row_number}"
+            sheet_id = self._get_sheet_id(location)
+            if sheet_id is None:
+                return False, f"No sheet found for {location}"
             
-            self.sheets_service.spreadsheets().values().update(
+            # Update the row
+            execute_with_retry(self.sheets_service.spreadsheets().batchUpdate(
                 spreadsheetId=self.spreadsheet_id,
-                range=range_name,
-                valueInputOption='RAW',
-                body={'values': [row_data]}
-            ).execute()
+                body={'requests': [self._update_cells_request(sheet_id, row_number, 0, row_data)]},
+                fields='spreadsheetId'  # Replies are not used
+            ))
             
             return True, f"Updated existing entry for {location} on {row_data[0]}"
             
@@ -571,13 +864,14 @@ class TemperatureSheetsService:
         """Add a new temperature entry for a location"""
         try:
             # Append the new row (starting from row 4 since rows 1-3 are headers)
-            self.sheets_service.spreadsheets().values().append(
+            execute_with_retry(self.sheets_service.spreadsheets().values().append(
                 spreadsheetId=self.spreadsheet_id,
-                range=f"{location}!A4:A",  # Start from row 4
+                range=self._a1_range(location, "A4:A"),  # Start from row 4
                 valueInputOption='RAW',
                 insertDataOption='INSERT_ROWS',
-                body={'values': [row_data]}
-            ).execute()
+                body={'values': [row_data]},
+                fields='spreadsheetId'  # The update summary is not used
+            ), idempotent=False)
             
             return True, f"Added new entry for {location} on {row_data[0]}"
             
@@ -588,51 +882,94 @@ class TemperatureSheetsService:
     
     def add_staff_confirmation(self, location, staff_name, date_str=None):
         """Add staff confirmation to an existing temperature entry for a specific location"""
+        _, success, message = self.add_staff_confirmations([(location, staff_name, date_str)])[0]
+        return success, message
+    
+    def add_staff_confirmations(self, confirmations):
+        """
+        Add staff confirmations for several locations with one batched read and one batched write
+        
+        Args:
+            confirmations: list of (location, staff_name, date_str) tuples, date_str may be None for today
+            
+        Returns:
+            List of (location, success, message) in the same order as confirmations
+        """
+        results = [None] * len(confirmations)
+        
         try:
-            if not staff_name or not staff_name.strip():
-                return False, "Staff name is required"
+            now = datetime.now()
+            today_str = now.strftime("%Y-%m-%d")
+            pending = []
+            
+            # Locations without a tab would fail the whole batch - report them per entry instead
+            sheet_ids = self._get_sheet_ids()
+            if any(location not in sheet_ids for location, _, _ in confirmations):
+                # A tab may have been added since the metadata was cached
+                sheet_ids = self._get_sheet_ids(refresh=True)
+            
+            for index, (location, staff_name, date_str) in enumerate(confirmations):
+                if not staff_name or not staff_name.strip():
+                    results[index] = (location, False, "Staff name is required")
+                elif location not in sheet_ids:
+                    results[index] = (location, False, f"No sheet found for {location}")
+                else:
+                    pending.append((index, location, staff_name.strip(), date_str or today_str))
             
-            if date_str is None:
-                date_str = datetime.now().strftime("%Y-%m-%d")
+            if not pending:
+                return results
             
-            # Find the entry for the specified date in the location sheet
-            result = self.sheets_service.spreadsheets().values().get(
+            # Find the entries for the specified dates in every location sheet at once
+            response = execute_with_retry(self.sheets_service.spreadsheets().values().batchGet(
                 spreadsheetId=self.spreadsheet_id,
-                range=f"{location}!A4:A"  # Start from row 4
-            ).execute()
-            
-            values = result.get('values', [])
-            target_row = None
-            
-            # Look for the date
-            for i, row in enumerate(values, start=4):  # Start from row 4
-                if row and row[0] == date_str:
-                    target_row = i
-                    break
-            
-            if not target_row:
-                return False, f"No temperature entry found for {location} on {date_str}"
+                ranges=[self._a1_range(location, "A4:A") for _, location, _, _ in pending],  # Start from row 4
+                fields='valueRanges.values'
+            ))
+            value_ranges = response.get('valueRanges', [])
             
             # Update logged time and staff name
-            current_time = datetime.now().strftime("%H:%M")
-            
-            # Update logged time (column E) and staff name (column F)
-            confirmation_range = f"{location}!E{target_row}:F{target_row}"
+            current_time = now.strftime("%H:%M")
+            requests = []
+            confirmed = []
             
-            self.sheets_service.spreadsheets().values().update(
-                spreadsheetId=self.spreadsheet_id,
-                range=confirmation_range,
-                valueInputOption='RAW',
-                body={'values': [[current_time, staff_name.strip()]]}
-            ).execute()
+            for (index, location, staff_name, date_str), value_range in zip(pending, value_ranges):
+                target_row = None
+                
+                # Look for the date
+                for i, row in enumerate(value_range.get('values', []), start=4):  # Start from row 4
+                    if row and row[0] == date_str:
+                        target_row = i
+                        break
+                
+                if not target_row:
+                    results[index] = (location, False, f"No temperature entry found for {location} on {date_str}")
+                    continue
+                
+                # Update logged time (column E) and staff name (column F)
+                requests.append(self._update_cells_request(
+                    sheet_ids[location], target_row, 4, [current_time, staff_name]
+                ))
+                confirmed.append((index, location, staff_name, date_str))
+            
+            if requests:
+                execute_with_retry(self.sheets_service.spreadsheets().batchUpdate(
+                    spreadsheetId=self.spreadsheet_id,
+                    body={'requests': requests},
+                    fields='spreadsheetId'  # Replies are not used
+                ))
             
-            logger.info(f"Staff confirmation added for {location}: {staff_name} on {date_str}")
-            return True, f"Confirmation added for {location}: {staff_name} at {current_time}"
+            for index, location, staff_name, date_str in confirmed:
+                logger.info(f"Staff confirmation added for {location}: {staff_name} on {date_str}")
+                results[index] = (location, True, f"Confirmation added for {location}: {staff_name} at {current_time}")
             
         except Exception as e:
-            error_msg = f"Error adding staff confirmation for {location}: {e}"
-            logger.error(error_msg)
-            return False, error_msg
+            logger.error(f"Error adding staff confirmations: {e}")
+            self._check_spreadsheet_error(e)
+            for index, (location, _, _) in enumerate(confirmations):
+                if results[index] is None:
+                    results[index] = (location, False, f"Error adding staff confirmation for {location}: {e}")
+        
+        return results
     
     def get_recent_entries(self, location, days=7):
         """Get recent temperature entries for a specific location"""
@@ -642,59 +979,118 @@ class TemperatureSheetsService:
                 if not success:
                     return [], message
             
-            # Get all data from the location sheet (starting from row 4)
-            result = self.sheets_service.spreadsheets().values().get(
+            # Entries are appended in date order, so find the last row from the date column
+            # and only fetch the bottom of the sheet instead of every row
+            date_column = execute_with_retry(self.sheets_service.spreadsheets().values().get(
                 spreadsheetId=self.spreadsheet_id,
-                range=f"{location}!A4:F"  # Start from row 4, get all columns
-            ).execute()
-            
-            values = result.get('values', [])
+                range=self._a1_range(location, "A4:A"),  # Start from row 4 (after headers)
+                fields='values'
+            ))
+            last_row = 3 + len(date_column.get('values', []))
+            
+            values = []
+            if last_row >= 4:
+                # Twice the requested days leaves room for incomplete rows that get skipped
+                first_row = max(4, last_row - days * 2 + 1)
+                result = execute_with_retry(self.sheets_service.spreadsheets().values().get(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=self._a1_range(location, f"A{first_row}:F{last_row}"),
+                    fields='values'
+                ))
+                values = result.get('values', [])
             
             if not values:
                 return [], f"No data found in {location} sheet"
             
-            # Convert to list of dictionaries
-            entries = []
-            for row in values:
-                if len(row) >= len(self.headers):
-                    entry = dict(zip(self.headers, row))
-                    entry['Location'] = location  # Add location info
-                    entries.append(entry)
-            
-            # Sort by date (most recent first) and limit to requested days
-            entries.sort(key=lambda x: x.get('Date', ''), reverse=True)
+            entries = self._recent_entries_from_rows(location, values, days)
             
-            return entries[:days], f"Retrieved {len(entries[:days])} recent entries for {location}"
+            return entries, f"Retrieved {len(entries)} recent entries for {location}"
             
         except Exception as e:
             error_msg = f"Error getting recent entries for {location}: {e}"
             logger.error(error_msg)
             return [], error_msg
     
-    def get_all_recent_entries(self, days=7):
-        """Get recent entries from all location sheets"""
+    def _recent_entries_from_rows(self, location, values, days):
+        """Convert sheet rows to TemperatureEntry tuples, most recent first, limited to `days` entries"""
+        header_count = len(self.headers)
+        entries = [
+            TemperatureEntry(*row[:header_count], location)
+            for row in values
+            if len(row) >= header_count
+        ]
+        
+        # Most recent first, limited to requested days - a bounded heap instead of sorting every row
+        return heapq.nlargest(days, entries, key=_entry_sort_key)
+    
+    def get_all_recent_entries(self, days=7, limit=None):
+        """
+        Get recent entries from all location sheets
+        
+        Args:
+            days: number of most recent entries to take from each location
+            limit: maximum number of entries to return overall (defaults to all of them)
+            
+        Returns:
+            Tuple of (entries most recent first, message)
+        """
         try:
-            # Get list of all sheets
-            sheet_metadata = self.sheets_service.spreadsheets().get(
-                spreadsheetId=self.spreadsheet_id
-            ).execute()
+            locations = list(self._get_sheet_ids())
+            rows_by_location = {}
+            
+            # Read every location sheet with one values.batchGet instead of one round trip each
+            if locations:
+                try:
+                    response = execute_with_retry(self.sheets_service.spreadsheets().values().batchGet(
+                        spreadsheetId=self.spreadsheet_id,
+                        ranges=[self._a1_range(location, "A4:F") for location in locations],  # Start from row 4
+                        fields='valueRanges.values'
+                    ))
+                    for location, value_range in zip(locations, response.get('valueRanges', [])):
+                        rows_by_location[location] = value_range.get('values', [])
+                except HttpError as e:
+                    # One bad range (e.g. a tab renamed since the metadata was cached) fails the whole
+                    # batch - read the sheets separately so the other locations are still returned
+                    if str(getattr(e.resp, 'status', '')) != '400':
+                        raise
+                    logger.warning(f"Batched read of all location sheets failed, reading them separately: {e}")
+                    rows_by_location = self._read_location_rows_concurrently(locations, "A4:F")
             
             all_entries = []
-            for sheet in sheet_metadata['sheets']:
-                location = sheet['properties']['title']
-                entries, message = self.get_recent_entries(location, days)
-                all_entries.extend(entries)
+            for location, rows in rows_by_location.items():
+                all_entries.extend(self._recent_entries_from_rows(location, rows, days))
             
-            # Sort all entries by date
-            all_entries.sort(key=lambda x: x.get('Date', ''), reverse=True)
+            # Most recent first across every location, optionally capped at `limit` entries
+            if limit is None:
+                limit = len(all_entries)
+            all_entries = heapq.nlargest(limit, all_entries, key=_entry_sort_key)
             
-            return all_entries[:days], f"Retrieved entries from all locations"
+            return all_entries, f"Retrieved entries from all locations"
             
         except Exception as e:
             error_msg = f"Error getting all recent entries: {e}"
             logger.error(error_msg)
             return [], error_msg
     
+    def _read_location_rows_concurrently(self, locations, cells, max_workers=8):
+        """Read the same range from several location sheets in parallel, skipping sheets that fail"""
+        # Each worker borrows its own client because the underlying HTTP connection is not thread-safe
+        def read_one(location):
+            try:
+                with self.auth_manager.borrow_sheets_service() as service:
+                    result = execute_with_retry(service.spreadsheets().values().get(
+                        spreadsheetId=self.spreadsheet_id,
+                        range=self._a1_range(location, cells),
+                        fields='values'
+                    ))
+                return location, result.get('values', [])
+            except Exception as e:
+                logger.error(f"Error reading {location} sheet: {e}")
+                return location, None
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(locations))) as executor:
+            return {location: rows for location, rows in executor.map(read_one, locations) if rows is not None}
+    
     def get_spreadsheet_url(self):
         """Get the URL of the current spreadsheet"""
         if self.spreadsheet_id:
@@ -707,21 +1103,55 @@ class TemperatureSheetsService:
             if not require_staff_confirmation:
                 return False, "Staff confirmation disabled in settings"
             
-            # Check if someone already confirmed today for this location
-            existing_entry = self.find_todays_entry(location)
-            if existing_entry:
-                # Get the existing data to check staff name
-                result = self.sheets_service.spreadsheets().values().get(
-                    spreadsheetId=self.spreadsheet_id,
-                    range=f"{location}!F{existing_entry}:F{existing_entry}"  # Staff Name column
-                ).execute()
-                
-                staff_values = result.get('values', [])
-                if staff_values and staff_values[0] and staff_values[0][0].strip():
-                    return False, f"Already confirmed by {staff_values[0][0]} for {location}"
+            # Check if someone already confirmed today for this location - the entry's row
+            # comes back with it, so the staff name needs no separate read
+            existing_entry, row = self.find_todays_entry_with_row(location)
+            if existing_entry and len(row) > 5 and row[5].strip():
+                return False, f"Already confirmed by {row[5]} for {location}"
             
             return True, f"Staff confirmation needed for {location}"
             
         except Exception as e:
             logger.error(f"Error checking staff confirmation for {location}: {e}")
             return True, "Unable to check - confirmation recommended"
+    
+    def check_staff_confirmation_needed_bulk(self, locations, require_staff_confirmation=True):
+        """
+        Check whether staff confirmation is needed today for several locations with one batched read
+        
+        Returns:
+            Dict of {location: (needed, message)}
+        """
+        locations = list(locations)
+        if not require_staff_confirmation:
+            return {location: (False, "Staff confirmation disabled in settings") for location in locations}
+        
+        results = {location: (True, f"Staff confirmation needed for {location}") for location in locations}
+        
+        try:
+            # Locations without a tab have no entry to confirm yet
+            sheet_ids = self._get_sheet_ids()
+            existing = [location for location in locations if location in sheet_ids]
+            if not existing:
+                return results
+            
+            today_str = datetime.now().strftime("%Y-%m-%d")
+            response = execute_with_retry(self.sheets_service.spreadsheets().values().batchGet(
+                spreadsheetId=self.spreadsheet_id,
+                ranges=[self._a1_range(location, "A4:F") for location in existing],  # Start from row 4
+                fields='valueRanges.values'
+            ))
+            
+            for location, value_range in zip(existing, response.get('valueRanges', [])):
+                for i, row in enumerate(value_range.get('values', []), start=4):  # Start from row 4
+                    if row and row[0] == today_str:
+                        self._remember_entry_row(location, today_str, i)
+                        if len(row) > 5 and row[5].strip():
+                            results[location] = (False, f"Already confirmed by {row[5]} for {location}")
+                        break
+            
+        except Exception as e:
+            logger.error(f"Error checking staff confirmations: {e}")
+            return {location: (True, "Unable to check - confirmation recommended") for location in locations}
+        
+        return results
@@ -3,26 +3,119 @@ Temperature Scheduler Service
 Handles scheduled temperature announcements and logging
 """
 
+import heapq
 import logging
-import schedule
-import time
+import itertools
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Callable
 
 logger = logging.getLogger(__name__)
 
+class ScheduledJob:
+    """A callback waiting in the shared scheduler"""
+    
+    def __init__(self, run_at, callback):
+        self.run_at = run_at
+        self.callback = callback
+        self.cancelled = False
+
+class SharedScheduler:
+    """One background thread that runs every scheduler's jobs from a heap ordered by run time"""
+    
+    # Longest single sleep - the wait is re-checked against the wall clock this often, so
+    # clock changes and system suspend delay a job by at most a minute. Kept well below
+    # TemperatureScheduler.MISFIRE_GRACE_SECONDS so a job is never skipped just because
+    # the thread overslept after a suspend that ended before the job was due
+    MAX_WAIT_SECONDS = 60
+    
+    def __init__(self):
+        self._jobs = []  # heap of (run_at, sequence, job)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+    
+    def schedule(self, run_at, callback):
+        """Run callback(job) at run_at, returning the job so it can be cancelled"""
+        job = ScheduledJob(run_at, callback)
+        with self._condition:
+            heapq.heappush(self._jobs, (run_at, next(self._sequence), job))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='temperature-scheduler', daemon=True)
+                self._thread.start()
+            # The new job may be due before the one the thread is sleeping on
+            self._condition.notify()
+        return job
+    
+    def cancel(self, job):
+        """Cancel a job - it is dropped from the heap when it reaches the top"""
+        with self._condition:
+            job.cancelled = True
+            self._condition.notify()
+    
+    def _next_due_job(self):
+        """Sleep until the earliest job is due and pop it"""
+        with self._condition:
+            while True:
+                while self._jobs and self._jobs[0][2].cancelled:
+                    heapq.heappop(self._jobs)
+                
+                if not self._jobs:
+                    self._condition.wait()
+                    continue
+                
+                remaining = (self._jobs[0][0] - datetime.now()).total_seconds()
+                if remaining <= 0:
+                    return heapq.heappop(self._jobs)[2]
+                self._condition.wait(timeout=min(remaining, self.MAX_WAIT_SECONDS))
+    
+    def _run(self):
+        """Scheduler thread - runs each job outside the lock so scheduling never waits on a job"""
+        while True:
+            job = self._next_due_job()
+            try:
+                job.callback(job)
+            except Exception as e:
+                logger.error(f"Error in scheduled job: {e}")
+
+# Shared by every TemperatureScheduler so the thread count stays at one however many there are
+shared_scheduler = SharedScheduler()
+
+# Announcements do slow Gmail and Sheets I/O, so they run here rather than on the scheduler thread
+announcement_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='announce')
+
 class TemperatureScheduler:
     """Service for scheduling temperature announcements"""
     
+    # Settings that decide whether and when announcements are queued - other settings are read per run
+    TIMING_SETTINGS = ('announce_time', 'enabled')
+    
+    # An announcement missed by up to this many seconds (app started late, PC asleep) still runs
+    MISFIRE_GRACE_SECONDS = 600
+    
     def __init__(self, config_manager, gmail_service, sheets_service=None):
         """Initialize the scheduler"""
         self.config_manager = config_manager
         self.gmail_service = gmail_service
         self.sheets_service = sheets_service
         self.is_running = False
-        self.scheduler_thread = None
         self.announcement_callback = None
+        # Next announcement waiting in the shared scheduler, guarded by _job_lock
+        self._job = None
+        self._job_lock = threading.Lock()
+        # Announcement handed to announcement_executor and not yet finished
+        self._announce_future = None
+        
+        # Last announcement formatted for display and its formatted result
+        self._last_formatted_data = None
+        self._last_formatted = None
+        
+        # Merged settings and the config section they were built from
+        self._settings_cache = None
+        self._settings_source = None
+        # Parsed announce_time: ('HH:MM', hour, minute)
+        self._announce_hm = None
         
         # Default settings
         self.default_settings = {
@@ -34,12 +127,14 @@ class TemperatureScheduler:
         }
     
     def get_schedule_settings(self):
-        """Get current schedule settings"""
+        """Get current schedule settings (shared between callers - do not modify the result)"""
         try:
             config = self.config_manager.config.get('scheduler', {})
-            settings = self.default_settings.copy()
-            settings.update(config)
-            return settings
+            # Rebuilt only after update_schedule_settings or when the config is reloaded
+            if self._settings_cache is None or config is not self._settings_source:
+                self._settings_cache = {**self.default_settings, **config}
+                self._settings_source = config
+            return self._settings_cache
         except Exception as e:
             logger.error(f"Error getting schedule settings: {e}")
             return self.default_settings.copy()
@@ -47,14 +142,24 @@ class TemperatureScheduler:
     def update_schedule_settings(self, settings):
         """Update schedule settings"""
         try:
+            # Parse the new announcement time before saving it - a bad value is rejected here
+            if 'announce_time' in settings:
+                self._announce_hour_minute(settings['announce_time'])
+            
+            current = self.get_schedule_settings()
+            timing_changed = any(
+                key in settings and settings[key] != current.get(key) for key in self.TIMING_SETTINGS
+            )
+            
             if 'scheduler' not in self.config_manager.config:
                 self.config_manager.config['scheduler'] = {}
             
             self.config_manager.config['scheduler'].update(settings)
             self.config_manager.save_config()
+            self._settings_cache = None
             
-            # Restart scheduler if running
-            if self.is_running:
+            # Restart scheduler if running and the schedule itself changed
+            if self.is_running and timing_changed:
                 self.stop_scheduler()
                 self.start_scheduler()
             
@@ -81,17 +186,11 @@ class TemperatureScheduler:
             if self.is_running:
                 return False, "Scheduler is already running"
             
-            # Clear any existing scheduled jobs
-            schedule.clear()
-            
-            # Schedule the daily announcement
+            # Queue the first announcement - a bad announcement time fails here
             announce_time = settings['announce_time']
-            schedule.every().day.at(announce_time).do(self._run_daily_announcement)
-            
-            # Start the scheduler thread
-            self.is_running = True
-            self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
-            self.scheduler_thread.start()
+            with self._job_lock:
+                self._schedule_next_announcement(announce_time, self._first_run_time(announce_time))
+                self.is_running = True
             
             logger.info(f"Temperature scheduler started - daily announcements at {announce_time}")
             return True, f"Scheduler started - daily announcements at {announce_time}"
@@ -107,12 +206,15 @@ class TemperatureScheduler:
             if not self.is_running:
                 return False, "Scheduler is not running"
             
-            self.is_running = False
-            schedule.clear()
-            
-            # Wait for thread to finish
-            if self.scheduler_thread and self.scheduler_thread.is_alive():
-                self.scheduler_thread.join(timeout=5)
+            with self._job_lock:
+                self.is_running = False
+                if self._job:
+                    shared_scheduler.cancel(self._job)
+                    self._job = None
+                # An announcement that has not started yet is dropped
+                if self._announce_future:
+                    self._announce_future.cancel()
+                    self._announce_future = None
             
             logger.info("Temperature scheduler stopped")
             return True, "Scheduler stopped successfully"
@@ -122,21 +224,88 @@ class TemperatureScheduler:
             logger.error(error_msg)
             return False, error_msg
     
-    def _scheduler_loop(self):
-        """Main scheduler loop"""
-        while self.is_running:
+    def _announce_hour_minute(self, announce_time):
+        """Parse an 'HH:MM' announcement time, reusing the result while the setting is unchanged"""
+        if self._announce_hm is None or self._announce_hm[0] != announce_time:
+            announce = datetime.strptime(announce_time, '%H:%M')
+            self._announce_hm = (announce_time, announce.hour, announce.minute)
+        return self._announce_hm[1], self._announce_hm[2]
+    
+    def _next_run_time(self, announce_time, now=None):
+        """Get the next occurrence of an 'HH:MM' announcement time"""
+        now = now or datetime.now()
+        hour, minute = self._announce_hour_minute(announce_time)
+        next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        return next_run
+    
+    def _first_run_time(self, announce_time, now=None):
+        """Get when the first announcement after starting should run - today's is still
+        run straight away if it was missed by less than MISFIRE_GRACE_SECONDS"""
+        now = now or datetime.now()
+        hour, minute = self._announce_hour_minute(announce_time)
+        todays_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        missed_by = (now - todays_run).total_seconds()
+        if 0 < missed_by <= self.MISFIRE_GRACE_SECONDS and self._last_announced_date() != now.date():
+            return now
+        return self._next_run_time(announce_time, now)
+    
+    def _last_announced_date(self):
+        """Get the date of the last scheduled announcement, kept in the config across restarts"""
+        last_announced = self.config_manager.config.get('scheduler_state', {}).get('last_announced')
+        try:
+            return datetime.strptime(last_announced, '%Y-%m-%d').date() if last_announced else None
+        except ValueError:
+            return None
+    
+    def _mark_announced(self, when):
+        """Remember that today's scheduled announcement has run"""
+        try:
+            state = self.config_manager.config.setdefault('scheduler_state', {})
+            state['last_announced'] = when.strftime('%Y-%m-%d')
+            self.config_manager.save_config()
+        except Exception as e:
+            logger.error(f"Error saving last announcement date: {e}")
+    
+    def _schedule_next_announcement(self, announce_time, run_at=None):
+        """Queue the next daily announcement in the shared scheduler (call with _job_lock held)"""
+        run_at = run_at or self._next_run_time(announce_time)
+        self._job = shared_scheduler.schedule(run_at, self._on_announcement_due)
+    
+    def _on_announcement_due(self, job):
+        """Hand a due announcement to the announcement executor and queue the next one"""
+        with self._job_lock:
+            # A job replaced by a stop/start while it was waiting to run is ignored
+            if job is not self._job or not self.is_running:
+                return
+            
+            # Queue the next announcement first, so a slow run never holds up the scheduler thread
             try:
-                schedule.run_pending()
-                time.sleep(60)  # Check every minute
+                self._schedule_next_announcement(self.get_schedule_settings()['announce_time'])
             except Exception as e:
-                logger.error(f"Error in scheduler loop: {e}")
-                time.sleep(60)
+                logger.error(f"Error scheduling next announcement: {e}")
+                self._job = None
+            
+            # A job that fires long after its time (the PC was asleep) is skipped rather than run late
+            late_by = (datetime.now() - job.run_at).total_seconds()
+            if late_by > self.MISFIRE_GRACE_SECONDS:
+                logger.warning(f"Skipping announcement due at {job.run_at.strftime('%H:%M')} - missed by {int(late_by)}s")
+                return
+            
+            # Only one scheduled announcement runs at a time
+            if self._announce_future and not self._announce_future.done():
+                logger.warning("Previous announcement still running - skipping this one")
+                return
+            
+            self._announce_future = announcement_executor.submit(self._run_daily_announcement)
     
     def _run_daily_announcement(self):
         """Run the daily temperature announcement"""
+        now = datetime.now()
         try:
             settings = self.get_schedule_settings()
-            announce_time = datetime.now().replace(second=0, microsecond=0)  # Current announcement time
+            announce_time = now.replace(second=0, microsecond=0)  # Current announcement time
             
             logger.info(f"Running daily temperature announcement at {announce_time.strftime('%H:%M')}...")
             
@@ -148,6 +317,9 @@ class TemperatureScheduler:
                 custom_logged_time=announce_time  # Use announce time as logged time
             )
             
+            # Drop the previous announcement's cached display
+            self._last_formatted_data = None
+            
             # Prepare announcement data
             announcement_data = {
                 'timestamp': announce_time,
@@ -155,6 +327,7 @@ class TemperatureScheduler:
                 'settings': settings,
                 'announcement_type': 'scheduled'
             }
+            self._mark_announced(now)
             
             # Call the announcement callback if set
             if self.announcement_callback:
@@ -170,7 +343,7 @@ class TemperatureScheduler:
             # Still call callback with error info
             if self.announcement_callback:
                 error_data = {
-                    'timestamp': datetime.now(),
+                    'timestamp': now,
                     'error': error_msg,
                     'announcement_type': 'scheduled_error'
                 }
@@ -178,6 +351,10 @@ class TemperatureScheduler:
     
     def _log_announcement_result(self, announcement_data):
         """Log the results of an announcement"""
+        # Everything below is INFO logging - skip building the messages when they would be dropped
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
         try:
             summary = announcement_data['summary']
             timestamp = announcement_data['timestamp']
@@ -191,6 +368,8 @@ class TemperatureScheduler:
                 
                 if summary.get('sheets_logged'):
                     logger.info(f"Data logged to sheets: {summary.get('sheets_message', '')}")
+                elif summary.get('sheets_pending'):
+                    logger.info("Data is being logged to sheets in the background")
             else:
                 logger.info(f"Daily announcement at {timestamp.strftime('%H:%M')}: No new temperature data found")
             
@@ -199,9 +378,10 @@ class TemperatureScheduler:
     
     def run_manual_announcement(self):
         """Run a manual temperature announcement (for testing)"""
+        now = datetime.now()
         try:
             settings = self.get_schedule_settings()
-            manual_time = datetime.now().replace(second=0, microsecond=0)  # Current time for manual run
+            manual_time = now.replace(second=0, microsecond=0)  # Current time for manual run
             
             logger.info(f"Running manual temperature announcement at {manual_time.strftime('%H:%M')}...")
             
@@ -213,6 +393,9 @@ class TemperatureScheduler:
                 custom_logged_time=manual_time  # Use current time as logged time for manual runs
             )
             
+            # Drop the previous announcement's cached display
+            self._last_formatted_data = None
+            
             # Prepare announcement data
             announcement_data = {
                 'timestamp': manual_time,
@@ -233,7 +416,7 @@ class TemperatureScheduler:
         except Exception as e:
             error_msg = f"Error running manual announcement: {e}"
             logger.error(error_msg)
-            return False, {'error': error_msg, 'timestamp': datetime.now()}
+            return False, {'error': error_msg, 'timestamp': now}
     
     def get_next_announcement_time(self):
         """Get the time of the next scheduled announcement"""
@@ -241,11 +424,10 @@ class TemperatureScheduler:
             if not self.is_running:
                 return None, "Scheduler is not running"
             
-            jobs = schedule.get_jobs()
-            if not jobs:
+            if not self._job:
                 return None, "No scheduled jobs found"
             
-            next_run = min(job.next_run for job in jobs)
+            next_run = self._job.run_at
             return next_run, f"Next announcement: {next_run.strftime('%Y-%m-%d %H:%M')}"
             
         except Exception as e:
@@ -268,7 +450,7 @@ class TemperatureScheduler:
                 'require_staff_confirmation': settings['require_staff_confirmation'],
                 'next_run': next_run,
                 'next_run_message': next_message,
-                'jobs_count': len(schedule.get_jobs()) if self.is_running else 0
+                'jobs_count': 1 if self.is_running and self._job else 0
             }
             
             return status
@@ -281,34 +463,48 @@ class TemperatureScheduler:
                 'error': str(e)
             }
     
-    def format_announcement_summary(self, announcement_data):
-        """Format announcement data for display"""
+    def format_announcement_summary(self, announcement_data, now=None):
+        """Format announcement data for display, reusing the result while the same announcement is shown"""
+        if announcement_data is self._last_formatted_data:
+            return self._last_formatted
+        
+        formatted = self._format_announcement_summary(announcement_data, now)
+        self._last_formatted_data = announcement_data
+        self._last_formatted = formatted
+        return formatted
+    
+    def _format_announcement_summary(self, announcement_data, now=None):
+        """Build the display dict for an announcement - now is only read if the data has no timestamp"""
         try:
-            summary = announcement_data.get('summary', {})
-            timestamp = announcement_data.get('timestamp', datetime.now())
+            summary = announcement_data.get('summary') or {}
+            timestamp = announcement_data.get('timestamp') or now or datetime.now()
             announcement_type = announcement_data.get('announcement_type', 'unknown')
+            time_text = timestamp.strftime('%Y-%m-%d %H:%M')
             
             if 'error' in announcement_data:
                 return {
                     'title': f"Temperature Announcement Error ({announcement_type})",
-                    'time': timestamp.strftime('%Y-%m-%d %H:%M'),
+                    'time': time_text,
                     'message': f"Error: {announcement_data['error']}",
                     'success': False
                 }
             
             # Format successful announcement
-            if summary.get('total_emails', 0) > 0:
-                locations_text = ", ".join(summary.get('locations', []))
+            total_emails = summary.get('total_emails', 0)
+            if total_emails > 0:
+                locations_text = ", ".join(summary.get('locations') or ())
                 latest = summary.get('latest_reading')
                 latest_text = f" Latest: {latest['value']}°C at {latest['location']}" if latest else ""
                 
                 message = (
-                    f"Found {summary['total_emails']} email(s) with {summary['total_readings']} temperature readings. "
+                    f"Found {total_emails} email(s) with {summary['total_readings']} temperature readings. "
                     f"Locations: {locations_text}.{latest_text}"
                 )
                 
                 if summary.get('sheets_logged'):
                     message += f" ✅ Logged to Google Sheets."
+                elif summary.get('sheets_pending'):
+                    message += " ⏳ Logging to Google Sheets in background."
                 else:
                     message += " ⚠️ Not logged to sheets."
             else:
@@ -316,9 +512,9 @@ class TemperatureScheduler:
             
             return {
                 'title': f"Temperature Announcement ({announcement_type})",
-                'time': timestamp.strftime('%Y-%m-%d %H:%M'),
+                'time': time_text,
                 'message': message,
-                'success': summary.get('total_emails', 0) > 0,
+                'success': total_emails > 0,
                 'summary': summary
             }
             
@@ -326,7 +522,7 @@ class TemperatureScheduler:
             logger.error(f"Error formatting announcement summary: {e}")
             return {
                 'title': "Temperature Announcement",
-                'time': datetime.now().strftime('%Y-%m-%d %H:%M'),
+                'time': (now or datetime.now()).strftime('%Y-%m-%d %H:%M'),
                 'message': f"Error formatting summary: {e}",
                 'success': False
             }
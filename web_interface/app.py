@@ -3,9 +3,18 @@ Flask web interface for Temperature Monitor
 Provides the setup wizard and configuration interface with real Gmail integration
 """
 
-from flask import Flask, render_template_string, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask.json.provider import DefaultJSONProvider
+import re
 import json
+import gzip
+import math
+import hashlib
 import logging
+import threading
+import uuid
+from collections import ChainMap, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import sys
 from pathlib import Path
@@ -19,11 +28,138 @@ sys.path.insert(0, str(project_root))
 from services.auth_manager import GmailAuthManager
 from services.gmail_service import GmailTemperatureService
 
+# orjson is optional - it encodes the larger JSON responses much faster than json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Announcement greeting for each hour of the day - morning until 12:00, afternoon until 17:00
+GREETINGS_BY_HOUR = ("Good morning",) * 12 + ("Good afternoon",) * 5 + ("Good evening",) * 7
+
+# The same HH:MM (24-hour) rule the settings page applies before saving
+ANNOUNCE_TIME_PATTERN = re.compile(r'^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$')
+
+# Email filters shown in the wizard until the user saves their own
+EMAIL_FILTER_DEFAULTS = {
+    'sender_addresses': ('notifications@cleverlogger.com',),
+    'subject_keywords': ('min-max', 'temperature report'),
+    'exclude_keywords': ('test', 'configuration'),
+}
+
+LOCATION_TYPES = ('fridge', 'room', 'custom')
+REQUIRED_LOCATION_FIELDS = frozenset(('type', 'min_temp', 'max_temp'))
+
+CSS_COMMENT_PATTERN = re.compile(r'/\*.*?\*/', re.DOTALL)
+CSS_WHITESPACE_PATTERN = re.compile(r'\s+')
+CSS_PUNCTUATION_SPACE_PATTERN = re.compile(r'\s*([{};,])\s*|(:)\s+')
+
+def minify_css(css):
+    """Strip comments and formatting whitespace from a stylesheet"""
+    css = CSS_COMMENT_PATTERN.sub('', css)
+    css = CSS_WHITESPACE_PATTERN.sub(' ', css)
+    css = CSS_PUNCTUATION_SPACE_PATTERN.sub(lambda m: m.group(1) or m.group(2), css)
+    return css.replace(';}', '}').strip()
+
+# Wizard stylesheet, minified once and served under a content-hashed URL so browsers can keep it
+WIZARD_CSS = minify_css(
+    (Path(__file__).parent / 'static' / 'wizard.css').read_text(encoding='utf-8')
+).encode('utf-8')
+WIZARD_CSS_VERSION = hashlib.md5(WIZARD_CSS).hexdigest()[:12]
+
+def location_settings_error(name, location_config):
+    """Get what is wrong with one location's temperature settings, or None if they are valid"""
+    if not isinstance(location_config, dict):
+        return f'Invalid settings for {name}'
+    
+    missing = REQUIRED_LOCATION_FIELDS - location_config.keys()
+    if missing:
+        return f"Missing required field in {name}: {', '.join(sorted(missing))}"
+    
+    if location_config['type'] not in LOCATION_TYPES:
+        return f"Invalid type for {name}: {location_config['type']}"
+    
+    # Fridge and room use fixed ranges - only a custom range is read from the settings
+    if location_config['type'] == 'custom':
+        min_temp, max_temp = location_config['min_temp'], location_config['max_temp']
+        if not all(isinstance(t, (int, float)) and not isinstance(t, bool) for t in (min_temp, max_temp)):
+            return f'Temperatures for {name} must be numbers'
+        if min_temp >= max_temp:
+            return f'Minimum temperature for {name} must be below the maximum'
+    
+    return None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes jsonify responses with orjson"""
+    
+    def _options(self):
+        # Datetimes still go through Flask's default so their format is unchanged
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._options())
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+class BackgroundTasks:
+    """Runs slow Google API work off the request thread so the page can poll for the result"""
+    
+    # Finished tasks kept around for the page to collect
+    MAX_TASKS = 100
+    
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='web-task')
+        self._tasks = OrderedDict()  # task_id -> Future
+        self._running = {}  # task name -> task_id
+        self._lock = threading.Lock()
+    
+    def submit(self, name, fn, *args):
+        """Start fn in the background, or return the id of the same task if it is still running"""
+        with self._lock:
+            running = self._tasks.get(self._running.get(name))
+            if running is not None and not running.done():
+                return self._running[name]
+            
+            task_id = uuid.uuid4().hex
+            self._tasks[task_id] = self._executor.submit(fn, *args)
+            self._running[name] = task_id
+            while len(self._tasks) > self.MAX_TASKS:
+                self._tasks.popitem(last=False)
+            return task_id
+    
+    def status(self, task_id):
+        """Get a task's state (PENDING, RUNNING, SUCCESS or FAILURE) with its result or error"""
+        with self._lock:
+            future = self._tasks.get(task_id)
+        if future is None:
+            return None
+        
+        if not future.done():
+            return {'state': 'RUNNING' if future.running() else 'PENDING'}
+        
+        error = future.exception()
+        if error is not None:
+            return {'state': 'FAILURE', 'error': str(error)}
+        return {'state': 'SUCCESS', 'result': future.result()}
+
 def create_app(desktop_app):
     """Create Flask app instance"""
     app = Flask(__name__)
+    if ORJSON_AVAILABLE:
+        app.json = OrjsonProvider(app)
     app.secret_key = 'temperature_monitor_secret_key_change_in_production'
     
     # Store reference to desktop app
@@ -36,6 +172,7 @@ def create_app(desktop_app):
     
     
     app.sheets_service = desktop_app.sheets_service
+    app.background_tasks = BackgroundTasks()
 
     def get_scheduler():
         """Get or create the scheduler instance - always use desktop app's instance"""
@@ -47,41 +184,36 @@ def create_app(desktop_app):
     # Set up announcement callback
     def announcement_callback(announcement_data):
         """Handle announcement results"""
-        print("🔍 DEBUG: announcement_callback called")  # DEBUG
-        scheduler = get_scheduler()
-        formatted = scheduler.format_announcement_summary(announcement_data)
-        print(f"🔍 DEBUG: formatted success = {formatted.get('success')}")  # DEBUG
+        formatted = app.scheduler.format_announcement_summary(announcement_data)
+        logger.debug("announcement_callback: formatted success=%s", formatted.get('success'))
         desktop_app.add_log_message(f"📢 {formatted['title']}: {formatted['message']}")
         
         # Create custom TTS message
         if formatted['success']:
-            print("🔍 DEBUG: Creating custom message...")  # DEBUG
             custom_message = create_natural_announcement(announcement_data, desktop_app.config)
-            print(f"🔍 DEBUG: Custom message = {custom_message[:50]}...")  # DEBUG
-            print("🔍 DEBUG: Calling speak_alert...")  # DEBUG
+            logger.debug("announcement_callback: speaking %r", custom_message)
             desktop_app.speak_alert(custom_message)
-            print("🔍 DEBUG: speak_alert call completed")  # DEBUG
         else:
-            print("🔍 DEBUG: Skipping voice - formatted success is False")  # DEBUG
-
-    # Set callback on scheduler when it's accessed
-    def ensure_callback_set():
-        scheduler = get_scheduler()
-        scheduler.set_announcement_callback(announcement_callback)
-        return scheduler
+            logger.debug("announcement_callback: skipping voice - formatted success is False")
+
+    # Wire the callback once - every route below shares this scheduler
+    app.scheduler = get_scheduler()
+    app.scheduler.set_announcement_callback(announcement_callback)
+
+    def location_thresholds(location_config):
+        """Get the (min, max) safe temperatures for a location's config"""
+        location_type = location_config.get('type', 'fridge')
+        if location_type == 'fridge':
+            return 2.0, 8.0
+        if location_type == 'room':
+            return 0.0, 25.0
+        # custom
+        return location_config.get('min_temp', 2.0), location_config.get('max_temp', 8.0)
 
     def create_natural_announcement(announcement_data, config):
         """Create natural language temperature announcement"""
-        import datetime
-        
         # Time-based greeting
-        hour = datetime.datetime.now().hour
-        if hour < 12:
-            greeting = "Good morning"
-        elif hour < 17:
-            greeting = "Good afternoon"  
-        else:
-            greeting = "Good evening"
+        greeting = GREETINGS_BY_HOUR[datetime.now().hour]
         
         summary = announcement_data.get('summary', {})
         all_readings = summary.get('all_readings', [])
@@ -89,17 +221,21 @@ def create_app(desktop_app):
         if not all_readings:
             return f"{greeting}. No temperature data found today. Please check your monitoring system."
         
-        # Group readings by location
+        # Fold readings into the lowest minimum and highest maximum per location in one pass
         locations = {}
         for reading in all_readings:
-            location = reading['location']
-            if location not in locations:
-                locations[location] = {'mins': [], 'maxs': []}
-            
-            if reading['type'] == 'minimum':
-                locations[location]['mins'].append(reading['value'])
-            elif reading['type'] == 'maximum':
-                locations[location]['maxs'].append(reading['value'])
+            reading_type = reading['type']
+            value = reading['value']
+            temps = locations.get(reading['location'])
+            if temps is None:
+                temps = locations[reading['location']] = [math.inf, -math.inf]
+            
+            if reading_type == 'minimum':
+                if value < temps[0]:
+                    temps[0] = value
+            elif reading_type == 'maximum':
+                if value > temps[1]:
+                    temps[1] = value
         
         # Build announcement
         announcement_parts = [greeting + "."]
@@ -113,22 +249,16 @@ def create_app(desktop_app):
         })
         location_configs = temp_config.get('locations', {})
         
-        for location, temps in locations.items():
-            if temps['mins'] and temps['maxs']:
-                min_temp = min(temps['mins'])
-                max_temp = max(temps['maxs'])
-                
-                # Get thresholds for this specific location
-                location_config = location_configs.get(location, global_default)
-                location_type = location_config.get('type', 'fridge')
-                
-                if location_type == 'fridge':
-                    min_threshold, max_threshold = 2.0, 8.0
-                elif location_type == 'room':
-                    min_threshold, max_threshold = 0.0, 25.0
-                else:  # custom
-                    min_threshold = location_config.get('min_temp', 2.0)
-                    max_threshold = location_config.get('max_temp', 8.0)
+        # Resolve each location's thresholds once up front
+        thresholds = {
+            location: location_thresholds(location_configs.get(location, global_default))
+            for location in locations
+        }
+        
+        for location, (min_temp, max_temp) in locations.items():
+            # Only locations with both a minimum and a maximum reading are announced
+            if min_temp != math.inf and max_temp != -math.inf:
+                min_threshold, max_threshold = thresholds[location]
                 
                 # Check for breaches using location-specific thresholds
                 location_breach = min_temp < min_threshold or max_temp > max_threshold
@@ -151,6 +281,17 @@ def create_app(desktop_app):
         
         return " ".join(announcement_parts)
 
+    # The wizard page only depends on the config, so compile it once and keep
+    # the last rendered page until the config changes
+    wizard_template = app.jinja_env.from_string(SETUP_WIZARD_TEMPLATE)
+    # Everything else the page renders from, shared by every render
+    wizard_context = {
+        'wizard_css_version': WIZARD_CSS_VERSION,
+        'filter_defaults': EMAIL_FILTER_DEFAULTS,
+    }
+    wizard_page_cache = {}
+    # Keeps ETags from one run of the app from matching pages cached by the browser in an earlier run
+    page_cache_id = uuid.uuid4().hex
     
 
     @app.route('/')
@@ -166,51 +307,97 @@ def create_app(desktop_app):
             logger.info(f"Web interface debug - Real Gmail email: {real_gmail_email}")
             logger.info(f"Web interface debug - Config Gmail connected: {desktop_app.config.get('gmail', {}).get('connected', False)}")
             
-            # Create display config with real status
-            display_config = desktop_app.config.copy()
-            
             # Force update Gmail status with real-time data
             if real_gmail_connected and real_gmail_email:
-                display_config['gmail'] = {
+                gmail_status = {
                     'connected': True,
-                    'email': real_gmail_email
+                    'email': real_gmail_email,
+                    'email_filters': desktop_app.config['gmail'].get('email_filters', {})
                 }
-                # Also update the desktop app config to keep them in sync
-                desktop_app.config['gmail']['connected'] = True
-                desktop_app.config['gmail']['email'] = real_gmail_email
-                desktop_app.save_config()
+                # Also update the desktop app config to keep them in sync - saved only when it changed
+                gmail_config = desktop_app.config['gmail']
+                if not gmail_config.get('connected') or gmail_config.get('email') != real_gmail_email:
+                    gmail_config['connected'] = True
+                    gmail_config['email'] = real_gmail_email
+                    desktop_app.save_config()
                 logger.info(f"Web interface - Forcing Gmail status to connected: {real_gmail_email}")
             else:
-                display_config['gmail'] = {
+                gmail_status = {
                     'connected': False,
                     'email': ''
                 }
                 logger.info("Web interface - Gmail not connected")
             
+            # Display config with the real status laid over the desktop config, without copying it
+            display_config = ChainMap({'gmail': gmail_status}, desktop_app.config)
+            
             # Debug: Print what we're sending to template
             logger.info(f"Web interface - Final config being sent to template: gmail_connected={display_config['gmail']['connected']}, email={display_config['gmail']['email']}")
             
-            return render_template_string(SETUP_WIZARD_TEMPLATE, config=display_config)
+            # The page changes only when the config is saved or the Gmail status changes
+            config_version = getattr(desktop_app, 'config_version', None)
+            if config_version is not None:
+                page_key = f"{page_cache_id}:{config_version}:{gmail_status['connected']}:{gmail_status['email']}"
+            else:
+                page_key = page_cache_id + json.dumps(dict(display_config), sort_keys=True, default=str)
+            etag = hashlib.md5(page_key.encode('utf-8')).hexdigest()
+            page = wizard_page_cache.get(etag)
+            if page is None:
+                html = render_template(wizard_template, config=display_config, **wizard_context)
+                # Encoded and compressed once per page version rather than on every load
+                html_bytes = html.encode('utf-8')
+                page = (html_bytes, gzip.compress(html_bytes, compresslevel=6))
+                wizard_page_cache.clear()
+                wizard_page_cache[etag] = page
+            
+            # Sent as ready-made bytes, so the response carries a Content-Length and is never chunked
+            html_bytes, compressed_html = page
+            if request.accept_encodings['gzip']:
+                response = app.response_class(compressed_html, mimetype='text/html')
+                response.headers['Content-Encoding'] = 'gzip'
+                etag += '-gzip'
+            else:
+                response = app.response_class(html_bytes, mimetype='text/html')
+            response.vary.add('Accept-Encoding')
+            
+            # Browsers revalidating an unchanged page get a 304 with no body
+            response.set_etag(etag)
+            return response.make_conditional(request)
             
         except Exception as e:
             logger.error(f"Error in web interface index route: {e}")
             # Fallback to basic config
-            return render_template_string(SETUP_WIZARD_TEMPLATE, config=desktop_app.config)
+            return render_template(wizard_template, config=desktop_app.config, **wizard_context)
+    
+    @app.route('/assets/wizard-<version>.css')
+    def wizard_css(version):
+        """Serve the wizard stylesheet - its URL changes whenever the content does"""
+        if version != WIZARD_CSS_VERSION:
+            return 'Not found', 404
+        response = app.response_class(WIZARD_CSS, mimetype='text/css')
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
     
     @app.route('/api/gmail/connect', methods=['POST'])
     def connect_gmail():
-        """Handle Gmail connection request - REAL OAuth flow"""
+        """Handle Gmail connection request - starts the REAL OAuth flow in the background"""
+        # The browser sign-in can take a while, so hand back a task id for the page to poll
+        task_id = app.background_tasks.submit('gmail_connect', run_gmail_connect)
+        return jsonify({'success': True, 'task_id': task_id, 'state': 'PENDING'})
+    
+    def run_gmail_connect():
+        """Run the OAuth flow and connect the Gmail service"""
         try:
             desktop_app.add_log_message("Starting Gmail authentication...")
             
             # Check if credentials.json exists
             valid, message = app.auth_manager.check_credentials_file()
             if not valid:
-                return jsonify({
+                return {
                     'success': False, 
                     'error': 'Credentials file missing. Please place credentials.json in the config folder.',
                     'details': message
-                })
+                }
             
             # Perform OAuth authentication
             success, auth_message = app.auth_manager.authenticate()
@@ -229,34 +416,34 @@ def create_app(desktop_app):
                 
                 if gmail_success:
                     # Update GUI status
-                    desktop_app.root.after(0, desktop_app.update_status_display)
+                    desktop_app.request_status_refresh()
                     desktop_app.add_log_message(f"Gmail connected successfully: {user_email}")
                     
-                    return jsonify({
+                    return {
                         'success': True, 
                         'message': f'Gmail connected successfully: {user_email}',
                         'email': user_email
-                    })
+                    }
                 else:
-                    return jsonify({
+                    return {
                         'success': False,
                         'error': 'Gmail service connection failed',
                         'details': gmail_message
-                    })
+                    }
             else:
-                return jsonify({
+                return {
                     'success': False,
                     'error': 'Gmail authentication failed',
                     'details': auth_message
-                })
+                }
             
         except Exception as e:
             logger.error(f"Error connecting Gmail: {e}")
             desktop_app.add_log_message(f"Gmail connection error: {str(e)}")
-            return jsonify({
+            return {
                 'success': False, 
                 'error': f'Gmail connection error: {str(e)}'
-            })
+            }
     
     @app.route('/api/gmail/disconnect', methods=['POST'])
     def disconnect_gmail():
@@ -271,7 +458,7 @@ def create_app(desktop_app):
                 desktop_app.save_config()
                 
                 # Update GUI status
-                desktop_app.root.after(0, desktop_app.update_status_display)
+                desktop_app.request_status_refresh()
                 desktop_app.add_log_message("Gmail disconnected successfully")
                 
                 return jsonify({'success': True, 'message': 'Gmail disconnected successfully'})
@@ -284,14 +471,19 @@ def create_app(desktop_app):
     
     @app.route('/api/gmail/test', methods=['POST'])
     def test_gmail():
-        """Test Gmail connection and search for temperature emails"""
+        """Test Gmail connection and search for temperature emails in the background"""
+        if not app.auth_manager.is_authenticated():
+            return jsonify({
+                'success': False, 
+                'error': 'Gmail not connected. Please connect first.'
+            })
+        
+        task_id = app.background_tasks.submit('gmail_test', run_gmail_test)
+        return jsonify({'success': True, 'task_id': task_id, 'state': 'PENDING'})
+    
+    def run_gmail_test():
+        """Search recent mail for temperature emails and summarise what was found"""
         try:
-            if not app.auth_manager.is_authenticated():
-                return jsonify({
-                    'success': False, 
-                    'error': 'Gmail not connected. Please connect first.'
-                })
-            
             desktop_app.add_log_message("Testing Gmail connection...")
             
             # Get recent temperature data
@@ -299,15 +491,29 @@ def create_app(desktop_app):
             
             desktop_app.add_log_message(f"Gmail test: {summary['message']}")
             
-            return jsonify({
+            return {
                 'success': True,
                 'message': 'Gmail test completed',
-                'summary': summary
-            })
+                'summary': summary.to_dict()
+            }
             
         except Exception as e:
             logger.error(f"Error testing Gmail: {e}")
-            return jsonify({'success': False, 'error': str(e)})
+            return {'success': False, 'error': str(e)}
+    
+    @app.route('/api/task/<task_id>', methods=['GET'])
+    def get_task_status(task_id):
+        """Get the state of a background task started by another route"""
+        status = app.background_tasks.status(task_id)
+        if status is None:
+            return jsonify({
+                'success': False,
+                'error': 'Unknown task'
+            }), 404
+        
+        status['success'] = True
+        status['task_id'] = task_id
+        return jsonify(status)
     
     @app.route('/api/settings/save', methods=['POST'])
     def save_settings():
@@ -334,7 +540,7 @@ def create_app(desktop_app):
             desktop_app.save_config()
             
             # Update GUI
-            desktop_app.root.after(0, desktop_app.update_status_display)
+            desktop_app.request_status_refresh()
             desktop_app.add_log_message("Settings saved successfully")
             
             return jsonify({'success': True, 'message': 'Settings saved successfully'})
@@ -368,15 +574,31 @@ def create_app(desktop_app):
             'last_update': datetime.now().isoformat()
         })
     
+    # Encoded /api/config body kept as (config_version, body, etag) until the config is saved again
+    config_response_cache = {}
+    
     @app.route('/api/config')
     def get_config():
         """Get current configuration"""
-        # Return config without sensitive data
-        safe_config = desktop_app.config.copy()
-        # Remove any sensitive credential data
-        if 'credentials' in safe_config['gmail']:
-            safe_config['gmail']['credentials'] = None
-        return jsonify(safe_config)
+        version = getattr(desktop_app, 'config_version', None)
+        cached = config_response_cache.get('config')
+        if cached is None or version is None or cached[0] != version:
+            # Return config without sensitive data
+            safe_config = desktop_app.config.copy()
+            # Remove any sensitive credential data - on a copy, so the saved config keeps it
+            if 'credentials' in safe_config.get('gmail', {}):
+                safe_config['gmail'] = {**safe_config['gmail'], 'credentials': None}
+            
+            if ORJSON_AVAILABLE:
+                body = orjson.dumps(safe_config)
+            else:
+                body = json.dumps(safe_config).encode('utf-8')
+            cached = (version, body, hashlib.md5(body).hexdigest())
+            config_response_cache['config'] = cached
+        
+        response = app.response_class(cached[1], mimetype='application/json')
+        response.set_etag(cached[2])
+        return response.make_conditional(request)
     
     @app.route('/api/gmail/save-filters', methods=['POST'])
     def save_email_filters():
@@ -460,7 +682,7 @@ def create_app(desktop_app):
     def get_scheduler_status():
         """Get current scheduler status"""
         try:
-            scheduler = ensure_callback_set()  # ✅ Changed
+            scheduler = app.scheduler
             status = scheduler.get_scheduler_status()
             
             logger.info(f"Scheduler status check: running={status.get('running')}, enabled={status.get('enabled')}")
@@ -480,7 +702,7 @@ def create_app(desktop_app):
     def get_scheduler_settings():
         """Get current scheduler settings"""
         try:
-            scheduler = get_scheduler()  # ✅ Changed
+            scheduler = app.scheduler
             settings = scheduler.get_schedule_settings()
             return jsonify({
                 'success': True,
@@ -496,21 +718,23 @@ def create_app(desktop_app):
     def update_scheduler_settings():
         """Update scheduler settings"""
         try:
-            data = request.get_json()
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                return jsonify({
+                    'success': False,
+                    'error': 'No data provided'
+                }), 400
             
-            # Validate required fields
+            # Validate time format (HH:MM)
             if 'announce_time' in data:
-                # Validate time format (HH:MM)
-                try:
-                    from datetime import datetime
-                    datetime.strptime(data['announce_time'], '%H:%M')
-                except ValueError:
+                announce_time = data['announce_time']
+                if not isinstance(announce_time, str) or not ANNOUNCE_TIME_PATTERN.match(announce_time):
                     return jsonify({
                         'success': False,
                         'error': 'Invalid time format. Use HH:MM (24-hour format)'
                     }), 400
             
-            scheduler = get_scheduler()  # ✅ Changed
+            scheduler = app.scheduler
             success, message = scheduler.update_schedule_settings(data)
             
             return jsonify({
@@ -527,7 +751,7 @@ def create_app(desktop_app):
     def start_scheduler():
         """Start the temperature scheduler"""
         try:
-            scheduler = ensure_callback_set()  # ✅ Changed
+            scheduler = app.scheduler
             success, message = scheduler.start_scheduler()
             
             return jsonify({
@@ -544,7 +768,7 @@ def create_app(desktop_app):
     def stop_scheduler():
         """Stop the temperature scheduler"""
         try:
-            scheduler = get_scheduler()  # ✅ Changed
+            scheduler = app.scheduler
             success, message = scheduler.stop_scheduler()
             
             return jsonify({
@@ -561,7 +785,7 @@ def create_app(desktop_app):
     def test_announcement():
         """Run a manual temperature announcement for testing"""
         try:
-            scheduler = ensure_callback_set()  # ✅ Changed
+            scheduler = app.scheduler
             success, result = scheduler.run_manual_announcement()
             
             if success:
@@ -588,7 +812,23 @@ def create_app(desktop_app):
         """Add staff confirmation to sheets"""
         try:
             data = request.get_json()
-            
+
+            # Several locations confirmed in one action go out as a single batch
+            if data and 'confirmations' in data:
+                confirmations = [
+                    (item.get('location', '').strip(), item.get('staff_name', ''), item.get('date_str'))
+                    for item in data['confirmations']
+                ]
+                results = app.gmail_service.add_staff_confirmations_to_sheets(confirmations)
+
+                return jsonify({
+                    'success': all(success for _, success, _ in results),
+                    'results': [
+                        {'location': location, 'success': success, 'message': message}
+                        for location, success, message in results
+                    ]
+                })
+
             if not data or 'staff_name' not in data or 'location' not in data:
                 return jsonify({
                     'success': False,
@@ -619,6 +859,35 @@ def create_app(desktop_app):
                 'error': str(e)
             }), 500
 
+    @app.route('/api/sheets/confirmation-status', methods=['GET'])
+    def get_staff_confirmation_status():
+        """Get today's staff confirmation status for every location with one Sheets read"""
+        try:
+            # ?locations=Fridge A,Room B - defaults to every configured location
+            locations_arg = request.args.get('locations', '')
+            if locations_arg:
+                locations = [location.strip() for location in locations_arg.split(',') if location.strip()]
+            else:
+                locations = list(desktop_app.config.get('temperature', {}).get('locations', {}))
+            
+            settings = app.scheduler.get_schedule_settings()
+            statuses = app.gmail_service.check_staff_confirmations_needed(
+                locations, settings['require_staff_confirmation']
+            )
+            
+            return jsonify({
+                'success': True,
+                'locations': [
+                    {'location': location, 'needed': needed, 'message': message}
+                    for location, (needed, message) in statuses.items()
+                ]
+            })
+        except Exception as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 500
+
     @app.route('/api/sheets/url', methods=['GET'])
     def get_sheets_url():
         """Get the Google Sheets URL"""
@@ -752,9 +1021,10 @@ def create_app(desktop_app):
     def save_location_settings():
         """Save per-location temperature settings"""
         try:
-            data = request.get_json()
+            # Malformed JSON is reported as missing data rather than failing the request
+            data = request.get_json(silent=True)
             
-            if not data:
+            if not data or not isinstance(data, dict):
                 return jsonify({
                     'success': False,
                     'error': 'No data provided'
@@ -762,33 +1032,38 @@ def create_app(desktop_app):
             
             global_default = data.get('global_default', {})
             locations = data.get('locations', {})
+            if not isinstance(locations, dict):
+                return jsonify({
+                    'success': False,
+                    'error': 'locations must be an object'
+                }), 400
             
-            # Validate the data
-            required_fields = ['type', 'min_temp', 'max_temp']
-            
-            # Validate global default
-            for field in required_fields:
-                if field not in global_default:
-                    return jsonify({
-                        'success': False,
-                        'error': f'Missing required field in global_default: {field}'
-                    }), 400
+            # Re-saving the settings as they already are needs no validation or write
+            current = desktop_app.config.get('temperature', {})
+            if global_default == current.get('global_default') and locations == current.get('locations'):
+                return jsonify({
+                    'success': True,
+                    'message': 'Location settings unchanged',
+                    'locations_updated': []
+                })
             
-            # Validate each location
+            # Validate everything before any of it is applied
+            error = location_settings_error('global_default', global_default)
             for location_name, location_config in locations.items():
-                for field in required_fields:
-                    if field not in location_config:
-                        return jsonify({
-                            'success': False,
-                            'error': f'Missing required field in {location_name}: {field}'
-                        }), 400
+                if error:
+                    break
+                error = location_settings_error(location_name, location_config)
             
-            # Update configuration
-            if 'temperature' not in desktop_app.config:
-                desktop_app.config['temperature'] = {}
+            if error:
+                return jsonify({
+                    'success': False,
+                    'error': error
+                }), 400
             
-            desktop_app.config['temperature']['global_default'] = global_default
-            desktop_app.config['temperature']['locations'] = locations
+            # Update configuration
+            temp_config = desktop_app.config.setdefault('temperature', {})
+            temp_config['global_default'] = global_default
+            temp_config['locations'] = locations
             
             # Save configuration
             desktop_app.save_config()
@@ -802,7 +1077,7 @@ def create_app(desktop_app):
             })
             
         except Exception as e:
-            logger.error(f"Error saving location settings: {e}")
+            logger.exception("Error saving location settings")
             return jsonify({
                 'success': False,
                 'error': str(e)
@@ -810,51 +1085,62 @@ def create_app(desktop_app):
 
     @app.route('/api/locations/discover', methods=['POST'])
     def discover_locations():
-        """Discover new locations from recent emails"""
+        """Discover new locations from recent emails in the background"""
+        if not app.auth_manager.is_authenticated():
+            return jsonify({
+                'success': False,
+                'error': 'Gmail not connected. Please connect first.'
+            }), 400
+        
+        # A week of mail is re-read and re-parsed, so hand back a task id for the page to poll
+        task_id = app.background_tasks.submit('discover_locations', run_location_discovery)
+        return jsonify({'success': True, 'task_id': task_id, 'state': 'PENDING'})
+    
+    def run_location_discovery():
+        """Re-read the last week of temperature emails and configure any new locations"""
         try:
-            if not app.auth_manager.is_authenticated():
-                return jsonify({
-                    'success': False,
-                    'error': 'Gmail not connected. Please connect first.'
-                }), 400
-            
             desktop_app.add_log_message("🔍 Discovering locations from recent emails...")
             
+            # Re-parse emails from scratch so discovery reflects the current parsing rules
+            app.gmail_service.clear_email_cache()
+            
             # Get recent temperature data to discover locations
             summary = app.gmail_service.get_temperature_summary(
                 hours_back=168, auto_log_to_sheets=False  # Last week
             )
             
             if summary.get('total_readings', 0) == 0:
-                return jsonify({
+                return {
                     'success': False,
                     'error': 'No temperature data found in recent emails'
-                })
+                }
             
-            # Use the sheets service discovery method
-            app.sheets_service.discover_and_configure_locations(summary.get('all_readings', []))
+            # The summary already lists each location once - no need to walk every reading
+            app.sheets_service.discover_and_configure_location_names(summary.get('locations', []))
             
             # Get updated location list
-            temp_config = desktop_app.config.get('temperature', {})
-            locations = temp_config.get('locations', {})
+            try:
+                locations = desktop_app.config['temperature']['locations']
+            except KeyError:
+                locations = {}
             location_names = list(locations.keys())
             
             desktop_app.add_log_message(f"🔍 Discovered {len(location_names)} locations: {', '.join(location_names)}")
             
-            return jsonify({
+            return {
                 'success': True,
                 'message': f'Discovered {len(location_names)} locations',
                 'locations_found': len(location_names),
                 'location_names': location_names,
                 'locations': locations
-            })
+            }
             
         except Exception as e:
-            logger.error(f"Error discovering locations: {e}")
-            return jsonify({
+            logger.exception("Error discovering locations")
+            return {
                 'success': False,
                 'error': str(e)
-            }), 500
+            }
         
     return app
 
@@ -866,323 +1152,7 @@ SETUP_WIZARD_TEMPLATE = '''
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Temperature Monitor Setup</title>
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }
-
-        .container {
-            max-width: 800px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 20px;
-            box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-            overflow: hidden;
-        }
-
-        .header {
-            background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
-            color: white;
-            padding: 30px;
-            text-align: center;
-        }
-
-        .header h1 {
-            font-size: 2rem;
-            margin-bottom: 10px;
-        }
-
-        .header p {
-            opacity: 0.9;
-            font-size: 1.1rem;
-        }
-
-        .content {
-            padding: 40px;
-        }
-
-        .setup-section {
-            margin-bottom: 40px;
-            padding: 25px;
-            border: 2px solid #f0f0f0;
-            border-radius: 15px;
-            transition: border-color 0.3s ease;
-        }
-
-        .setup-section:hover {
-            border-color: #4facfe;
-        }
-
-        .section-title {
-            font-size: 1.3rem;
-            font-weight: 600;
-            color: #333;
-            margin-bottom: 15px;
-        }
-
-        .gmail-connect {
-            display: flex;
-            align-items: center;
-            gap: 15px;
-            margin-top: 15px;
-            flex-wrap: wrap;
-        }
-
-        .btn {
-            padding: 12px 24px;
-            border: none;
-            border-radius: 8px;
-            font-size: 1rem;
-            font-weight: 500;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            text-decoration: none;
-            display: inline-flex;
-            align-items: center;
-            gap: 8px;
-        }
-
-        .btn-primary {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-        }
-
-        .btn-primary:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 8px 20px rgba(102, 126, 234, 0.3);
-        }
-
-        .btn-success {
-            background: #28a745;
-            color: white;
-        }
-
-        .btn-warning {
-            background: #ffc107;
-            color: #212529;
-        }
-
-        .btn-danger {
-            background: #dc3545;
-            color: white;
-        }
-
-        .btn:disabled {
-            opacity: 0.6;
-            cursor: not-allowed;
-            transform: none !important;
-        }
-
-        .status-connected {
-            background: #d4edda;
-            color: #155724;
-            padding: 10px 15px;
-            border-radius: 8px;
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            flex: 1;
-        }
-
-        .status-disconnected {
-            background: #f8d7da;
-            color: #721c24;
-            padding: 10px 15px;
-            border-radius: 8px;
-            display: flex;
-            align-items: center;
-            gap: 8px;
-        }
-
-        .temp-options {
-            display: grid;
-            gap: 20px;
-            margin-top: 20px;
-        }
-
-        .temp-option {
-            padding: 20px;
-            border: 2px solid #e9ecef;
-            border-radius: 12px;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            position: relative;
-        }
-
-        .temp-option:hover {
-            border-color: #4facfe;
-            box-shadow: 0 4px 12px rgba(79, 172, 254, 0.15);
-        }
-
-        .temp-option.selected {
-            border-color: #4facfe;
-            background: #f8fbff;
-        }
-
-        .temp-option input[type="radio"] {
-            position: absolute;
-            opacity: 0;
-        }
-
-        .option-header {
-            display: flex;
-            align-items: center;
-            margin-bottom: 10px;
-        }
-
-        .option-title {
-            font-weight: 600;
-            font-size: 1.1rem;
-            color: #333;
-        }
-
-        .option-description {
-            color: #666;
-            margin-bottom: 10px;
-        }
-
-        .temp-range {
-            background: #f8f9fa;
-            padding: 8px 12px;
-            border-radius: 6px;
-            font-family: monospace;
-            font-weight: 500;
-            color: #495057;
-        }
-
-        .custom-inputs {
-            display: none;
-            margin-top: 15px;
-            gap: 15px;
-        }
-
-        .custom-inputs.active {
-            display: flex;
-        }
-
-        .input-group {
-            display: flex;
-            flex-direction: column;
-            gap: 5px;
-        }
-
-        .input-group label {
-            font-weight: 500;
-            color: #333;
-            font-size: 0.9rem;
-        }
-
-        .input-group input,
-        .input-group select {
-            padding: 10px;
-            border: 2px solid #e9ecef;
-            border-radius: 6px;
-            font-size: 1rem;
-            transition: border-color 0.3s ease;
-        }
-
-        .input-group input:focus,
-        .input-group select:focus {
-            outline: none;
-            border-color: #4facfe;
-        }
-
-        .tts-settings {
-            display: grid;
-            grid-template-columns: 1fr 1fr;
-            gap: 20px;
-            margin-top: 20px;
-        }
-
-        .save-section {
-            text-align: center;
-            padding-top: 20px;
-            border-top: 2px solid #f0f0f0;
-            margin-top: 40px;
-        }
-
-        .status-indicator {
-            display: inline-block;
-            width: 8px;
-            height: 8px;
-            border-radius: 50%;
-            margin-right: 8px;
-        }
-
-        .status-connected .status-indicator {
-            background: #28a745;
-        }
-
-        .status-disconnected .status-indicator {
-            background: #dc3545;
-        }
-
-        .alert {
-            padding: 15px;
-            border-radius: 8px;
-            margin: 15px 0;
-        }
-
-        .alert-success {
-            background: #d4edda;
-            color: #155724;
-            border: 1px solid #c3e6cb;
-        }
-
-        .alert-error {
-            background: #f8d7da;
-            color: #721c24;
-            border: 1px solid #f5c6cb;
-        }
-
-        .alert-info {
-            background: #d1ecf1;
-            color: #0c5460;
-            border: 1px solid #bee5eb;
-        }
-
-        .test-results {
-            margin-top: 15px;
-            padding: 15px;
-            background: #f8f9fa;
-            border-radius: 8px;
-            border-left: 4px solid #4facfe;
-        }
-
-        .test-results h4 {
-            margin-bottom: 10px;
-            color: #333;
-        }
-
-        .test-results ul {
-            margin: 0;
-            padding-left: 20px;
-        }
-
-        @media (max-width: 768px) {
-            .tts-settings {
-                grid-template-columns: 1fr;
-            }
-            
-            .custom-inputs {
-                flex-direction: column;
-            }
-
-            .gmail-connect {
-                flex-direction: column;
-                align-items: stretch;
-            }
-        }
-    </style>
+    <link rel="stylesheet" href="/assets/wizard-{{ wizard_css_version }}.css">
 </head>
 <body>
     <div class="container">
@@ -1220,6 +1190,7 @@ SETUP_WIZARD_TEMPLATE = '''
             </div>
 
             <!-- Email Filter Section -->
+            {% set filters = config.gmail.get('email_filters', {}) %}
             <div class="setup-section" id="email-filter-section" {% if not config.gmail.connected %}style="display: none;"{% endif %}>
                 <div class="section-title">Email Filter Settings</div>
                 <p>Configure which emails to monitor for temperature reports.</p>
@@ -1229,14 +1200,14 @@ SETUP_WIZARD_TEMPLATE = '''
                     <!-- Sender Addresses -->
                     <div class="input-group">
                         <label for="sender-addresses">Sender Email Addresses</label>
-                        <textarea id="sender-addresses" rows="3" placeholder="notifications@cleverlogger.com&#10;alerts@sensaphone.net&#10;reports@temptracker.com" style="padding: 10px; border: 2px solid #e9ecef; border-radius: 6px; font-size: 1rem; resize: vertical;">{% for sender in config.gmail.get('email_filters', {}).get('sender_addresses', ['notifications@cleverlogger.com']) %}{{ sender }}{% if not loop.last %}&#10;{% endif %}{% endfor %}</textarea>
+                        <textarea id="sender-addresses" rows="3" placeholder="notifications@cleverlogger.com&#10;alerts@sensaphone.net&#10;reports@temptracker.com" style="padding: 10px; border: 2px solid #e9ecef; border-radius: 6px; font-size: 1rem; resize: vertical;">{% for sender in filters.get('sender_addresses', filter_defaults.sender_addresses) %}{{ sender }}{% if not loop.last %}&#10;{% endif %}{% endfor %}</textarea>
                         <small style="color: #666;">One email address per line</small>
                     </div>
                     
                     <!-- Subject Keywords -->
                     <div class="input-group">
                         <label for="subject-keywords">Required Subject Keywords</label>
-                        <textarea id="subject-keywords" rows="3" placeholder="min-max&#10;temperature report&#10;daily summary" style="padding: 10px; border: 2px solid #e9ecef; border-radius: 6px; font-size: 1rem; resize: vertical;">{% for keyword in config.gmail.get('email_filters', {}).get('subject_keywords', ['min-max', 'temperature report']) %}{{ keyword }}{% if not loop.last %}&#10;{% endif %}{% endfor %}</textarea>
+                        <textarea id="subject-keywords" rows="3" placeholder="min-max&#10;temperature report&#10;daily summary" style="padding: 10px; border: 2px solid #e9ecef; border-radius: 6px; font-size: 1rem; resize: vertical;">{% for keyword in filters.get('subject_keywords', filter_defaults.subject_keywords) %}{{ keyword }}{% if not loop.last %}&#10;{% endif %}{% endfor %}</textarea>
                         <small style="color: #666;">Email must contain at least one of these</small>
                     </div>
                     
@@ -1247,7 +1218,7 @@ SETUP_WIZARD_TEMPLATE = '''
                     <!-- Exclude Keywords -->
                     <div class="input-group">
                         <label for="exclude-keywords">Exclude Keywords</label>
-                        <textarea id="exclude-keywords" rows="2" placeholder="test&#10;configuration&#10;welcome" style="padding: 10px; border: 2px solid #e9ecef; border-radius: 6px; font-size: 1rem; resize: vertical;">{% for keyword in config.gmail.get('email_filters', {}).get('exclude_keywords', ['test', 'configuration']) %}{{ keyword }}{% if not loop.last %}&#10;{% endif %}{% endfor %}</textarea>
+                        <textarea id="exclude-keywords" rows="2" placeholder="test&#10;configuration&#10;welcome" style="padding: 10px; border: 2px solid #e9ecef; border-radius: 6px; font-size: 1rem; resize: vertical;">{% for keyword in filters.get('exclude_keywords', filter_defaults.exclude_keywords) %}{{ keyword }}{% if not loop.last %}&#10;{% endif %}{% endfor %}</textarea>
                         <small style="color: #666;">Skip emails containing these words</small>
                     </div>
                     
@@ -1256,7 +1227,7 @@ SETUP_WIZARD_TEMPLATE = '''
                         <label>Options</label>
                         <div style="display: flex; flex-direction: column; gap: 8px; margin-top: 8px;">
                             <label style="display: flex; align-items: center; gap: 8px; font-weight: normal;">
-                                <input type="checkbox" id="require-pdf" {% if config.gmail.get('email_filters', {}).get('require_pdf', True) %}checked{% endif %}>
+                                <input type="checkbox" id="require-pdf" {% if filters.get('require_pdf', True) %}checked{% endif %}>
                                 Require PDF attachment
                             </label>
                             <label style="display: flex; align-items: center; gap: 8px; font-weight: normal;">
@@ -1280,24 +1251,25 @@ SETUP_WIZARD_TEMPLATE = '''
                 <p>Configure temperature monitoring criteria for each discovered location.</p>
                 
                 <!-- Global Default Settings -->
+                {% set global_default = config.temperature.global_default %}
                 <div style="background: #f8f9fa; padding: 15px; border-radius: 8px; margin-bottom: 20px;">
                     <h4 style="margin-bottom: 15px; color: #333;">🌐 Default Settings for New Locations</h4>
                     <div style="display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 15px;">
                         <div class="input-group">
                             <label>Default Type</label>
                             <select id="global-default-type">
-                                <option value="fridge" {% if config.temperature.global_default.type == 'fridge' %}selected{% endif %}>Fridge (2-8°C)</option>
-                                <option value="room" {% if config.temperature.global_default.type == 'room' %}selected{% endif %}>Room (0-25°C)</option>
-                                <option value="custom" {% if config.temperature.global_default.type == 'custom' %}selected{% endif %}>Custom Range</option>
+                                <option value="fridge" {% if global_default.type == 'fridge' %}selected{% endif %}>Fridge (2-8°C)</option>
+                                <option value="room" {% if global_default.type == 'room' %}selected{% endif %}>Room (0-25°C)</option>
+                                <option value="custom" {% if global_default.type == 'custom' %}selected{% endif %}>Custom Range</option>
                             </select>
                         </div>
                         <div class="input-group">
                             <label>Min Temp (°C)</label>
-                            <input type="number" id="global-default-min" step="0.1" value="{{ config.temperature.global_default.min_temp }}">
+                            <input type="number" id="global-default-min" step="0.1" value="{{ global_default.min_temp }}">
                         </div>
                         <div class="input-group">
                             <label>Max Temp (°C)</label>
-                            <input type="number" id="global-default-max" step="0.1" value="{{ config.temperature.global_default.max_temp }}">
+                            <input type="number" id="global-default-max" step="0.1" value="{{ global_default.max_temp }}">
                         </div>
                     </div>
                 </div>
@@ -1421,4 +1393,4 @@ SETUP_WIZARD_TEMPLATE = '''
     <script src="/static/app.js"></script>
 </body>
 </html>
-'''
\ No newline at end of file
+'''
@@ -16,18 +16,39 @@ function showAlert(message, type = 'success') {
     }, 5000);
 }
 
-function connectGmail() {
-    const btn = document.getElementById('gmail-connect-btn');
-    btn.innerHTML = 'Connecting...';
-    btn.disabled = true;
-    
-    fetch('/api/gmail/connect', {
+// POST to a route that runs in the background and resolve with the task's result
+function runTask(url) {
+    return fetch(url, {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
         }
     })
     .then(response => response.json())
+    .then(data => data.task_id ? pollTask(data.task_id) : data);
+}
+
+function pollTask(taskId) {
+    return new Promise(resolve => setTimeout(resolve, 500))
+    .then(() => fetch(`/api/task/${taskId}`))
+    .then(response => response.json())
+    .then(data => {
+        if (data.state === 'SUCCESS') {
+            return data.result;
+        }
+        if (!data.success || data.state === 'FAILURE') {
+            return {success: false, error: data.error};
+        }
+        return pollTask(taskId);
+    });
+}
+
+function connectGmail() {
+    const btn = document.getElementById('gmail-connect-btn');
+    btn.innerHTML = 'Connecting...';
+    btn.disabled = true;
+    
+    runTask('/api/gmail/connect')
     .then(data => {
         if (data.success) {
             showAlert('Gmail connected successfully!');
@@ -77,13 +98,7 @@ function testGmail() {
     const testContainer = document.getElementById('test-results-container');
     testContainer.innerHTML = '<div class="alert alert-info">Testing Gmail connection and searching for temperature emails...</div>';
 
-    fetch('/api/gmail/test', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        }
-    })
-    .then(response => response.json())
+    runTask('/api/gmail/test')
     .then(data => {
         if (data.success) {
             const summary = data.summary;
@@ -421,7 +436,7 @@ async function testAnnouncement() {
                     <div class="test-result-item"><strong>Emails Found:</strong> ${summary.total_emails}</div>
                     <div class="test-result-item"><strong>Temperature Readings:</strong> ${summary.total_readings}</div>
                     <div class="test-result-item"><strong>Locations:</strong> ${summary.locations.join(', ')}</div>
-                    <div class="test-result-item"><strong>Sheets Logged:</strong> ${summary.sheets_logged ? 'Yes' : 'No'}</div>
+                    <div class="test-result-item"><strong>Sheets Logged:</strong> ${summary.sheets_logged ? 'Yes' : (summary.sheets_pending ? 'In background' : 'No')}</div>
                     ${summary.latest_reading ? `<div class="test-result-item"><strong>Latest:</strong> ${summary.latest_reading.value}°C at ${summary.latest_reading.location}</div>` : ''}
                 `;
                 resultsDiv.style.display = 'block';
@@ -852,8 +867,7 @@ function saveLocationSettings() {
 function refreshLocations() {
     showAlert('info', 'Discovering locations from recent emails...');
     
-    fetch('/api/locations/discover', {method: 'POST'})
-        .then(response => response.json())
+    runTask('/api/locations/discover')
         .then(data => {
             if (data.success) {
                 showAlert('success', `Discovered ${data.locations_found} locations: ${data.location_names.join(', ')}`);